@@ -0,0 +1,291 @@
+"""
+Admission control for the /api routes: token-bucket rate limits and
+per-route concurrency caps, with fast rejections instead of slow queues.
+
+Every request is checked, in order, against:
+
+1. its client's bucket for the route (client_rate/client_burst): 429;
+2. the route's shared bucket (rate/burst), if set: 429;
+3. the route's concurrency gate (max_concurrent), if set: up to max_queue
+   requests wait at most queue_timeout seconds for a slot; beyond that, 503.
+
+Rejections carry Retry-After and never reach the endpoint, so a noisy
+client can't fill the worker threadpool that /api/guide also needs.
+Limits are per process (each uvicorn worker enforces its own) and are
+configured through settings.admission_default and settings.admission_routes
+(route templates such as "/api/chat"). Clients are identified by their
+address, or by the first X-Forwarded-For hop when
+settings.admission_trust_forwarded_for is on (only behind a trusted proxy).
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Optional
+
+from fastapi.responses import ORJSONResponse
+
+from .config import settings
+from .metrics import Counter, route_label
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    client_rate: Optional[float] = None  # requests/second per client
+    client_burst: Optional[float] = None
+    rate: Optional[float] = None  # requests/second for the route, all clients together
+    burst: Optional[float] = None
+    max_concurrent: Optional[int] = None
+    max_queue: int = 0
+    queue_timeout: float = 1.0
+
+    @classmethod
+    def from_settings(cls, *layers: dict):
+        """
+        Later layers override earlier ones; unknown keys are a configuration error.
+        """
+        known = {f.name for f in fields(cls)}
+        merged = {}
+        for layer in layers:
+            unknown = set(layer) - known
+            if unknown:
+                raise ValueError(f"Unknown admission setting(s): {', '.join(sorted(unknown))}")
+            merged.update(layer)
+        return cls(**merged)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: Optional[float], now: float):
+        self.rate = rate
+        # Without an explicit burst, allow one second's worth of requests at once
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self.tokens = self.burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Take a token. Returns 0 if there was one, else the seconds until there will be.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1.0)
+
+
+class ConcurrencyGate:
+    """
+    At most `limit` requests inside; up to `max_queue` more wait in FIFO order.
+    Only used from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, limit: int, max_queue: int, timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """
+        None once admitted, otherwise why not ("queue_full" or "queue_timeout").
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the waiter, in_flight stays the same
+            await asyncio.wait_for(waiter, self.timeout)
+            return None
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the request was abandoned: pass it on
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class AdmissionController:
+    def __init__(self, default: Optional[dict] = None, routes: Optional[Dict[str, dict]] = None,
+                 max_clients: Optional[int] = None, trust_forwarded_for: Optional[bool] = None,
+                 enabled: Optional[bool] = None, clock: Callable[[], float] = time.monotonic):
+        self.default = settings.admission_default if default is None else default
+        self.routes = settings.admission_routes if routes is None else routes
+        self.max_clients = settings.admission_max_clients if max_clients is None else max_clients
+        self.trust_forwarded_for = (settings.admission_trust_forwarded_for
+                                    if trust_forwarded_for is None else trust_forwarded_for)
+        self.enabled = settings.admission_enabled if enabled is None else enabled
+        self._clock = clock
+        self._policies: Dict[str, RoutePolicy] = {}
+        # (client, route) -> bucket, least recently used first
+        self._client_buckets: "OrderedDict[tuple, TokenBucket]" = OrderedDict()
+        self._route_buckets: Dict[str, TokenBucket] = {}
+        self._gates: Dict[str, ConcurrencyGate] = {}
+        self.outcomes = Counter("geopulse_admission_requests_total",
+                                "API requests by admission outcome.", ("route", "outcome"))
+        # Fail at start-up, not on the first request, if the settings are wrong
+        self.policy("*")
+        for route in self.routes:
+            self.policy(route)
+
+    def policy(self, route: str) -> RoutePolicy:
+        policy = self._policies.get(route)
+        if policy is None:
+            policy = self._policies[route] = RoutePolicy.from_settings(self.default, self.routes.get(route, {}))
+        return policy
+
+    def client_key(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _client_bucket(self, client: str, route: str, policy: RoutePolicy, now: float) -> TokenBucket:
+        key = (client, route)
+        bucket = self._client_buckets.get(key)
+        if bucket is None:
+            bucket = self._client_buckets[key] = TokenBucket(policy.client_rate, policy.client_burst, now)
+            while len(self._client_buckets) > self.max_clients:
+                self._client_buckets.popitem(last=False)
+        else:
+            self._client_buckets.move_to_end(key)
+        return bucket
+
+    def check_rate(self, client: str, route: str, policy: RoutePolicy):
+        """
+        (outcome, retry after seconds) of the token buckets; outcome None means admitted.
+        """
+        now = self._clock()
+        client_bucket = None
+        if policy.client_rate is not None:
+            client_bucket = self._client_bucket(client, route, policy, now)
+            wait = client_bucket.take(now)
+            if wait:
+                return "client_rate", wait
+        if policy.rate is not None:
+            bucket = self._route_buckets.get(route)
+            if bucket is None:
+                bucket = self._route_buckets[route] = TokenBucket(policy.rate, policy.burst, now)
+            wait = bucket.take(now)
+            if wait:
+                # The client didn't get served, so don't charge it
+                if client_bucket is not None:
+                    client_bucket.refund()
+                return "route_rate", wait
+        return None, 0.0
+
+    def gate(self, route: str, policy: RoutePolicy) -> Optional[ConcurrencyGate]:
+        if policy.max_concurrent is None:
+            return None
+        gate = self._gates.get(route)
+        if gate is None:
+            gate = self._gates[route] = ConcurrencyGate(policy.max_concurrent, policy.max_queue, policy.queue_timeout)
+        return gate
+
+    def collect(self) -> List[str]:
+        """
+        Prometheus exposition lines (see metrics.Registry.register_collector).
+        """
+        lines = self.outcomes.render()
+        lines += [
+            "# HELP geopulse_admission_in_flight Requests inside a route's concurrency cap.",
+            "# TYPE geopulse_admission_in_flight gauge",
+        ]
+        lines += [f'geopulse_admission_in_flight{{route="{route}"}} {gate.in_flight}'
+                  for route, gate in sorted(self._gates.items())]
+        lines += [
+            "# HELP geopulse_admission_queued Requests waiting for a slot under a route's concurrency cap.",
+            "# TYPE geopulse_admission_queued gauge",
+        ]
+        lines += [f'geopulse_admission_queued{{route="{route}"}} {gate.queued}'
+                  for route, gate in sorted(self._gates.items())]
+        lines += [
+            "# HELP geopulse_admission_clients Client buckets currently tracked.",
+            "# TYPE geopulse_admission_clients gauge",
+            f"geopulse_admission_clients {len(self._client_buckets)}",
+        ]
+        return lines
+
+
+def _reject(status_code: int, outcome: str, retry_after: float):
+    detail = "Too many requests" if status_code == 429 else "Server busy"
+    seconds = max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 60
+    return ORJSONResponse(status_code=status_code, content={"detail": f"{detail} ({outcome}), retry later"},
+                          headers={"Retry-After": str(seconds)})
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware. Sits inside CORS, so rejections still carry CORS
+    headers (and preflights are never limited). A request holds its concurrency
+    slot until its last byte is sent, so streamed chat answers count too.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if scope["type"] != "http" or not controller.enabled or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        route = scope.get("geopulse.route") or route_label(scope["app"], scope)
+        policy = controller.policy(route)
+        outcome, wait = controller.check_rate(controller.client_key(scope), route, policy)
+        if outcome is not None:
+            controller.outcomes.inc(route, outcome)
+            await _reject(429, outcome, wait)(scope, receive, send)
+            return
+
+        gate = controller.gate(route, policy)
+        if gate is not None:
+            outcome = await gate.acquire()
+            if outcome is not None:
+                controller.outcomes.inc(route, outcome)
+                await _reject(503, outcome, gate.timeout)(scope, receive, send)
+                return
+
+        controller.outcomes.inc(route, "admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if gate is not None:
+                gate.release()
+
+
+# Shared instance used by the middleware and /metrics
+admission_controller = AdmissionController()
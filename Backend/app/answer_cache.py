@@ -0,0 +1,111 @@
+"""
+Bounded LRU + TTL cache of finished chat answers.
+
+Chat traffic is dominated by a handful of questions ("do I tip?", "how to
+greet"), so ChatService keys each answer on (normalized message, resolved
+country, intent) and serves repeats from memory. Entries are tied to
+catalog.data_version like the guide cache. The catalog re-reads the
+database's version every settings.data_version_check_interval seconds (on
+the ChatService's ensure_loaded), so a re-seed or an edit drops every
+answer within that delay. Otherwise an answer lives for chat_cache_ttl.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
+
+from .config import settings
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def normalize_message(message: str) -> str:
+    """
+    "  Do I TIP??" -> "do i tip". Only words reach the classifier and search, so
+    case, spacing and punctuation never change the answer.
+    """
+    return " ".join(_WORD_RE.findall(message.casefold()))
+
+
+class AnswerCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = settings.chat_cache_size if max_entries is None else max_entries
+        self.ttl_seconds = settings.chat_cache_ttl if ttl_seconds is None else ttl_seconds
+        self._clock = clock
+        # key -> (expires_at, answer), least recently used first
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"lru": 0, "ttl": 0, "invalidated": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, version, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key) if version == self._version else None
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self.evictions["ttl"] += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, version, key: Hashable, answer: dict):
+        if not self.enabled:
+            return
+        with self._lock:
+            if version != self._version:
+                self.evictions["invalidated"] += len(self._entries)
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = (self._clock() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions["lru"] += 1
+
+    def clear(self):
+        with self._lock:
+            self.evictions["invalidated"] += len(self._entries)
+            self._entries.clear()
+            self._version = None
+
+    def collect(self) -> List[str]:
+        """
+        Prometheus exposition lines (see metrics.Registry.register_collector).
+        """
+        lines = [
+            "# HELP geopulse_chat_cache_hits_total Chat answers served from the cache.",
+            "# TYPE geopulse_chat_cache_hits_total counter",
+            f"geopulse_chat_cache_hits_total {self.hits}",
+            "# HELP geopulse_chat_cache_misses_total Chat answers that had to be computed.",
+            "# TYPE geopulse_chat_cache_misses_total counter",
+            f"geopulse_chat_cache_misses_total {self.misses}",
+            "# HELP geopulse_chat_cache_evictions_total Cached chat answers dropped, by reason.",
+            "# TYPE geopulse_chat_cache_evictions_total counter",
+        ]
+        lines += [f'geopulse_chat_cache_evictions_total{{reason="{reason}"}} {count}'
+                  for reason, count in sorted(self.evictions.items())]
+        lines += [
+            "# HELP geopulse_chat_cache_entries Chat answers currently cached.",
+            "# TYPE geopulse_chat_cache_entries gauge",
+            f"geopulse_chat_cache_entries {len(self._entries)}",
+        ]
+        return lines
+
+
+# Shared instance used by ChatService
+answer_cache = AnswerCache()
@@ -0,0 +1,242 @@
+"""
+Write-behind recording of quiz attempts.
+
+POST /api/quiz/{country}/attempts grades the answers against the quiz bank,
+queues them and returns right away. A background writer thread drains the
+queue in batches, so a burst of clicks becomes a few multi-row transactions
+instead of one SQLite write lock per click. Once a batch has committed,
+running per-question and per-country aggregates are updated in memory.
+/api/quiz/{country}/stats reads those without touching the database.
+
+The queue is bounded. When it is full, submissions are refused (503 with
+Retry-After) instead of growing memory. On shutdown the lifespan stops the
+writer, which flushes whatever is still queued. Aggregates start from the
+attempts already in the database and then count this process's own writes.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, insert, select
+
+from . import database
+from .config import settings
+from .models import QuizAttempt
+
+logger = logging.getLogger("geopulse.attempts")
+
+FLUSH_RETRIES = (0.1, 0.5, 2.0)  # seconds to wait before each retry of a failed batch
+
+
+@dataclass(frozen=True)
+class Attempt:
+    question_id: int
+    country_id: int
+    answer: str
+    is_correct: bool
+    created_at: datetime
+
+
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Tally:
+    __slots__ = ("attempts", "correct")
+
+    def __init__(self, attempts: int = 0, correct: int = 0):
+        self.attempts = attempts
+        self.correct = correct
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "correct": self.correct,
+            "accuracy": round(self.correct / self.attempts, 4) if self.attempts else None,
+            # Smoothed share of wrong answers, so one lucky guess doesn't make a question "easy"
+            "difficulty": round(1 - (self.correct + 1) / (self.attempts + 2), 4),
+        }
+
+
+class AttemptRecorder:
+    def __init__(self, max_pending: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, engine=None):
+        self.max_pending = settings.quiz_attempt_queue_size if max_pending is None else max_pending
+        self.batch_size = batch_size or settings.quiz_attempt_batch_size
+        self.flush_interval = settings.quiz_attempt_flush_interval if flush_interval is None else flush_interval
+        self._engine = engine
+        self._pending: "deque[Attempt]" = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._totals_loaded = False
+        self._in_flight = 0
+        self._by_question: Dict[int, Tally] = {}
+        self._by_country: Dict[int, Tally] = {}
+        self._stats_lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @property
+    def engine(self):
+        return self._engine or database.engine
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="geopulse-attempt-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush everything still queued and stop the writer. Returns False if it
+        didn't finish within timeout.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def submit(self, attempts: List[Attempt]) -> bool:
+        """
+        Queue a submission, all or nothing. False when the queue has no room (backpressure).
+        """
+        if not self._stopping and (self._thread is None or not self._thread.is_alive()):
+            self.start()
+        with self._cond:
+            if self._stopping or len(self._pending) + len(attempts) > self.max_pending:
+                self.rejected += len(attempts)
+                return False
+            self._pending.extend(attempts)
+            self.accepted += len(attempts)
+            self._cond.notify()
+        return True
+
+    def queue_depth(self) -> int:
+        return len(self._pending) + self._in_flight
+
+    def retry_after(self) -> int:
+        # Seconds until the writer has likely made room, at one batch per flush interval
+        batches = self.queue_depth() / max(self.batch_size, 1)
+        return max(1, int(batches * max(self.flush_interval, 0.05)) + 1)
+
+    def _next_batch(self) -> Optional[List[Attempt]]:
+        with self._cond:
+            while not self._pending and not self._stopping:
+                self._cond.wait()
+            # Give a burst a moment to fill the batch, unless it is already full
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._pending) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._pending:
+                return None
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._in_flight = len(batch)
+            return batch
+
+    def _run(self):
+        if not self._totals_loaded:
+            self._totals_loaded = True
+            try:
+                self._load_totals()
+            except Exception:
+                logger.exception("Could not load quiz attempt totals; stats start from zero")
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._flush(batch)
+            with self._cond:
+                self._in_flight = 0
+
+    def _flush(self, batch: List[Attempt]):
+        rows = [{"question_id": a.question_id, "country_id": a.country_id, "answer": a.answer,
+                 "is_correct": a.is_correct, "created_at": a.created_at} for a in batch]
+        for attempt, delay in enumerate((0.0,) + FLUSH_RETRIES):
+            time.sleep(delay)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(QuizAttempt.__table__), rows)
+            except Exception:
+                logger.warning("Writing %d quiz attempts failed (try %d)", len(rows), attempt + 1, exc_info=True)
+                continue
+            self.written += len(batch)
+            self.batches += 1
+            self._count(batch)
+            return
+        self.dropped += len(batch)
+        logger.error("Dropped %d quiz attempts after %d tries", len(batch), len(FLUSH_RETRIES) + 1)
+
+    def _count(self, batch: List[Attempt]):
+        with self._stats_lock:
+            for a in batch:
+                for table, key in ((self._by_question, a.question_id), (self._by_country, a.country_id)):
+                    tally = table.get(key)
+                    if tally is None:
+                        tally = table[key] = Tally()
+                    tally.attempts += 1
+                    tally.correct += a.is_correct
+
+    def _load_totals(self):
+        correct = func.sum(case((QuizAttempt.is_correct, 1), else_=0))
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(QuizAttempt.question_id, QuizAttempt.country_id, func.count(), correct)
+                                .group_by(QuizAttempt.question_id, QuizAttempt.country_id)).all()
+        with self._stats_lock:
+            for question_id, country_id, attempts, right in rows:
+                for table, key in ((self._by_question, question_id), (self._by_country, country_id)):
+                    tally = table.setdefault(key, Tally())
+                    tally.attempts += attempts
+                    tally.correct += right or 0
+
+    def country_stats(self, country_id: int, questions) -> dict:
+        """
+        Totals for a country plus every question of its bank, hardest first.
+        """
+        with self._stats_lock:
+            total = self._by_country.get(country_id, Tally())
+            tallies = [(q, self._by_question.get(q["id"], Tally())) for q in questions]
+            summary = total.to_dict()
+            items = [dict({"question_id": q["id"], "question": q["question"]}, **t.to_dict()) for q, t in tallies]
+        items.sort(key=lambda item: -item["difficulty"])
+        summary["questions"] = items
+        return summary
+
+    def collect(self) -> List[str]:
+        """
+        Prometheus exposition lines (see metrics.Registry.register_collector).
+        """
+        return [
+            "# HELP geopulse_quiz_attempts_total Quiz attempts by outcome in the write-behind queue.",
+            "# TYPE geopulse_quiz_attempts_total counter",
+            f'geopulse_quiz_attempts_total{{outcome="accepted"}} {self.accepted}',
+            f'geopulse_quiz_attempts_total{{outcome="rejected"}} {self.rejected}',
+            f'geopulse_quiz_attempts_total{{outcome="written"}} {self.written}',
+            f'geopulse_quiz_attempts_total{{outcome="dropped"}} {self.dropped}',
+            "# HELP geopulse_quiz_attempt_batches_total Batched transactions written.",
+            "# TYPE geopulse_quiz_attempt_batches_total counter",
+            f"geopulse_quiz_attempt_batches_total {self.batches}",
+            "# HELP geopulse_quiz_attempt_queue_depth Quiz attempts waiting to be written.",
+            "# TYPE geopulse_quiz_attempt_queue_depth gauge",
+            f"geopulse_quiz_attempt_queue_depth {self.queue_depth()}",
+        ]
+
+
+# Shared instance used by the attempts endpoints
+attempt_recorder = AttemptRecorder()
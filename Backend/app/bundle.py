@@ -0,0 +1,136 @@
+"""
+Offline data bundles: every country, detail and quiz question in one
+document, plus deltas with only the rows changed since a version.
+
+A client downloads /api/bundle once (gzip/brotli, ETag = content hash)
+and remembers its "version". It then polls
+/api/bundle/delta?since=<version>, applies the changed rows and drops the
+ids listed under "deleted". This replaces hundreds of per-country requests
+with one small response. Row versions come from changes.py.
+
+The same documents can be written to disk for shipping with an app build:
+
+    python -m app.bundle export [--output DIR] [--since VERSION]
+"""
+import gzip
+import hashlib
+import os
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from . import changes, crud, models
+from .guide_cache import PayloadCache, serialize
+
+FORMAT_VERSION = 1
+
+
+def country_row(c) -> dict:
+    return {"id": c.id, "name": c.name, "language": c.language}
+
+
+def detail_row(d) -> dict:
+    return {
+        "id": d.id,
+        "country_id": d.country_id,
+        "category": d.category,
+        "topic": d.topic,
+        "description": d.description,
+        "is_strict": bool(d.is_strict),
+    }
+
+
+def question_row(q) -> dict:
+    return {
+        "id": q.id,
+        "country_id": q.country_id,
+        "question": q.question,
+        "options": [q.option_a, q.option_b, q.option_c, q.option_d],
+        "answer": q.answer,
+    }
+
+
+def build_bundle(db: Session) -> dict:
+    """
+    The whole dataset as of the current version. The version is read first, in the
+    same transaction, so the rows are never older than the version they claim.
+    """
+    version = changes.current_version(db)
+    return {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "countries": [country_row(c) for c in sorted(crud.get_all_countries(db), key=lambda c: c.id)],
+        "details": [detail_row(d) for d in crud.get_all_cultural_details(db)],
+        "questions": [question_row(q) for q in crud.get_all_quiz_questions(db)],
+    }
+
+
+def build_delta(db: Session, since: int) -> Optional[dict]:
+    """
+    Rows inserted or updated after version `since` and ids deleted since then.
+    None if `since` is newer than anything this database has handed out (the
+    client synced against another database and needs a full bundle).
+    """
+    version = changes.current_version(db)
+    if since > version:
+        return None
+    deleted = {key: [] for key in changes.TRACKED_TABLES.values()}
+    for tombstone in crud.get_tombstones(db, since):
+        key = changes.TRACKED_TABLES.get(tombstone.table_name)
+        if key:
+            deleted[key].append(tombstone.row_id)
+    return {
+        "format": FORMAT_VERSION,
+        "since": since,
+        "version": version,
+        "countries": [country_row(c) for c in crud.get_changed_rows(db, models.Country, since)],
+        "details": [detail_row(d) for d in crud.get_changed_rows(db, models.CulturalDetail, since)],
+        "questions": [question_row(q) for q in crud.get_changed_rows(db, models.QuizQuestion, since)],
+        "deleted": deleted,
+    }
+
+
+# Full bundles keyed on their version; one entry is kept
+bundle_cache = PayloadCache()
+
+
+def export(db: Session, output_dir: str, since: Optional[int] = None) -> str:
+    """
+    Write a gzip'd bundle (or delta) named after its version and content hash. Returns the path.
+    """
+    document = build_bundle(db) if since is None else build_delta(db, since)
+    if document is None:
+        raise ValueError(f"Version {since} is newer than the database")
+    body = serialize(document)
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    name = (f"geopulse-bundle-v{document['version']}-{digest}.json.gz" if since is None
+            else f"geopulse-delta-v{since}-v{document['version']}-{digest}.json.gz")
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, name)
+    with open(path, "wb") as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Export the dataset as an offline bundle.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--output", default=".", help="Directory to write to (default: current)")
+    parser.add_argument("--since", type=int, help="Only rows changed after this version (a delta)")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        try:
+            written = export(session, args.output, args.since)
+        except ValueError as e:
+            parser.error(str(e))
+    finally:
+        session.close()
+    print(f"Wrote {written} ({os.path.getsize(written) / 1e6:.2f}MB) in {time.perf_counter() - started:.1f}s")
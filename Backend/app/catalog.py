@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .config import settings
+from .country_detector import CountryDetector
+from .country_matcher import FuzzyIndex, PrefixTrie
+from .snapshot import snapshot_store
+
+logger = logging.getLogger("geopulse.catalog")
+
+# Common short-hands users type instead of the canonical country name.
+# Keys are matched after normalize_name(), values must be canonical names.
+ALIASES = {
+    "usa": "United States",
+    "us": "United States",
+    "america": "United States",
+    "uk": "United Kingdom",
+    "uae": "United Arab Emirates",
+}
+
+# Aliases that are ordinary words in free text ("tell us about...", "South America")
+# and must not be treated as a country mention by the chat detector.
+AMBIGUOUS_ALIASES = {"us", "america"}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Casefold and collapse whitespace so "  united   KINGDOM " == "united kingdom".
+    """
+    return " ".join(name.casefold().split())
+
+
+@dataclass(frozen=True)
+class CountryRecord:
+    """
+    Read-only copy of a Country row, safe to share across requests and threads.
+    """
+    id: int
+    name: str
+    language: Optional[str]
+
+
+class CountryCatalog:
+    """
+    Process-wide, in-memory index of all countries.
+
+    Loaded once from the shared snapshot (or the database when there is none);
+    afterwards every name/alias lookup is a dict hit with no database round trip.
+    At most every check_interval seconds ensure_loaded() re-reads
+    crud.get_data_version, so a re-seed or an edit reloads the catalog (and
+    rebuilds the snapshot first, unless another worker already has).
+    data_version is what the guide, payload and answer caches are keyed on.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None, check_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.aliases = {normalize_name(k): v for k, v in (aliases if aliases is not None else ALIASES).items()}
+        self._by_id: Dict[int, CountryRecord] = {}
+        self._by_key: Dict[str, CountryRecord] = {}
+        self._ordered: List[CountryRecord] = []
+        self._detector = CountryDetector([])
+        self._fuzzy = FuzzyIndex([])
+        self._trie = PrefixTrie([])
+        self._lock = threading.Lock()
+        self.loaded = False
+        # Fingerprint of the data the index was built from (see crud.get_data_version)
+        self.data_version = None
+        self.check_interval = settings.data_version_check_interval if check_interval is None else check_interval
+        self._clock = clock
+        self._next_check = 0.0
+
+    def load(self, db: Session):
+        """
+        (Re)build the index from the snapshot, or the countries table without one.
+        """
+        data_version = crud.get_data_version(db)
+        try:
+            # Rebuild the snapshot if the database has moved on since it was written
+            snapshot_store.ensure_current(db)
+        except OSError as e:
+            logger.warning("Could not rebuild the snapshot: %s", e)
+        snapshot = snapshot_store.current()
+        if snapshot is not None and snapshot.data_version == data_version:
+            records = [CountryRecord(*row) for row in snapshot.countries()]
+        else:
+            records = [CountryRecord(c.id, c.name, c.language) for c in crud.get_all_countries(db)]
+        by_id = {r.id: r for r in records}
+        by_key = {normalize_name(r.name): r for r in records}
+        for alias, target in self.aliases.items():
+            record = by_key.get(normalize_name(target))
+            # Never let an alias shadow a real country name
+            if record and alias not in by_key:
+                by_key[alias] = record
+
+        patterns = [(r.name, r) for r in records]
+        patterns += [(alias, by_key[alias]) for alias in self.aliases
+                     if alias in by_key and alias not in AMBIGUOUS_ALIASES]
+        detector = CountryDetector(patterns)
+        fuzzy = FuzzyIndex(by_key.items())
+        trie = PrefixTrie((key, record, record.name) for key, record in by_key.items())
+
+        # Swap in the new index in one go so readers never see a partial state
+        with self._lock:
+            self._by_id = by_id
+            self._by_key = by_key
+            self._ordered = records
+            self._detector = detector
+            self._fuzzy = fuzzy
+            self._trie = trie
+            self.data_version = data_version
+            self.loaded = True
+            self._next_check = self._clock() + self.check_interval
+
+    def needs_check(self) -> bool:
+        """
+        True when ensure_loaded() has to look at the database (cheap, no I/O).
+        """
+        return not self.loaded or self._clock() >= self._next_check
+
+    def is_stale(self, db: Session) -> bool:
+        if not self.needs_check():
+            return False
+        self._next_check = self._clock() + self.check_interval
+        return not self.loaded or crud.get_data_version(db) != self.data_version
+
+    def ensure_loaded(self, db: Session):
+        if self.is_stale(db):
+            self.load(db)
+
+    async def ensure_loaded_async(self, db):
+        """
+        Same as ensure_loaded() for an AsyncSession.
+        """
+        if self.needs_check():
+            await db.run_sync(self.ensure_loaded)
+
+    def resolve(self, name: Optional[str]) -> Optional[CountryRecord]:
+        """
+        Resolve a user supplied country name or alias. Returns None if unknown.
+        """
+        if not name:
+            return None
+        return self._by_key.get(normalize_name(name))
+
+    def resolve_fuzzy(self, name: Optional[str]) -> Optional[CountryRecord]:
+        """
+        resolve(), but an unambiguous misspelling ("Japn", "Phillipines") resolves
+        to the country it is closest to.
+        """
+        record = self.resolve(name)
+        if record is None and name:
+            record = self._fuzzy.correct(normalize_name(name))
+        return record
+
+    def suggest(self, name: str, limit: int = 5) -> List[CountryRecord]:
+        """
+        Closest countries to a (misspelled) name, best first.
+        """
+        return [record for record, _, _ in self._fuzzy.search(normalize_name(name), limit=limit)]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[CountryRecord]:
+        """
+        Countries whose name (or a word in it, or an alias) starts with prefix. Falls
+        back to fuzzy suggestions when nothing starts with it.
+        """
+        key = normalize_name(prefix)
+        matches = self._trie.complete(key, limit) if key else []
+        if not matches and len(key) >= 3:
+            matches = self.suggest(key, limit)
+        return matches
+
+    def detect(self, text: str) -> List[CountryRecord]:
+        """
+        All countries mentioned in free text, ranked by position of first mention.
+        """
+        return self._detector.detect(text)
+
+    def get(self, country_id: int) -> Optional[CountryRecord]:
+        return self._by_id.get(country_id)
+
+    def all(self) -> List[CountryRecord]:
+        return self._ordered
+
+
+# Shared instance used by the API and ChatService
+catalog = CountryCatalog()
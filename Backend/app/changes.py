@@ -0,0 +1,100 @@
+"""
+Row versions for incremental sync (/api/bundle/delta).
+
+countries, cultural_details and quiz_questions carry a `version` column
+drawn from one counter (the single row of sync_state). The bulk loader
+takes one new version per load and stamps every row it inserts with it.
+On SQLite, triggers also version rows that are inserted, updated or deleted
+by anything else; a deleted row leaves a tombstone with the version of the
+delete. A client that has seen version V only needs the rows and
+tombstones with a version above V.
+"""
+from typing import Dict
+
+from sqlalchemy import text
+
+from .models import Country, CulturalDetail, QuizQuestion
+
+# Table name -> the key used for its rows in bundles and deltas
+TRACKED_TABLES: Dict[str, str] = {
+    Country.__tablename__: "countries",
+    CulturalDetail.__tablename__: "details",
+    QuizQuestion.__tablename__: "questions",
+}
+
+_NEXT_VERSION_SQL = "UPDATE sync_state SET version = version + 1 WHERE id = 1;"
+_CURRENT_VERSION_SQL = "(SELECT version FROM sync_state WHERE id = 1)"
+
+
+def _trigger_sql(table: str):
+    # version = 0 on insert, or unchanged on update, means the writer didn't stamp the row
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table}
+        WHEN new.version = 0 BEGIN
+            {_NEXT_VERSION_SQL}
+            UPDATE {table} SET version = {_CURRENT_VERSION_SQL} WHERE id = new.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER UPDATE ON {table}
+        WHEN new.version = old.version BEGIN
+            {_NEXT_VERSION_SQL}
+            UPDATE {table} SET version = {_CURRENT_VERSION_SQL} WHERE id = new.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN
+            {_NEXT_VERSION_SQL}
+            INSERT INTO tombstones (table_name, row_id, version)
+            VALUES ('{table}', old.id, {_CURRENT_VERSION_SQL});
+        END""",
+    ]
+
+
+def install(engine) -> bool:
+    """
+    Create the sync_state row and (SQLite only) the versioning triggers.
+    Returns True if anything was created.
+    """
+    created = False
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM sync_state WHERE id = 1")).first() is None:
+            # Continue above any versions already present (e.g. a restored database)
+            start = max(conn.execute(text(f"SELECT coalesce(max(version), 0) FROM {table}")).scalar()
+                        for table in list(TRACKED_TABLES) + ["tombstones"])
+            conn.execute(text("INSERT INTO sync_state (id, version) VALUES (1, :v)"), {"v": start})
+            created = True
+        if engine.dialect.name != "sqlite":
+            # Elsewhere only the bulk loader stamps versions
+            return created
+        existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+        for table in TRACKED_TABLES:
+            if f"{table}_version_ad" not in existing:
+                for statement in _trigger_sql(table):
+                    conn.execute(text(statement))
+                created = True
+    return created
+
+
+def current_version(conn) -> int:
+    """
+    Latest version handed out (0 before the first change). conn may be a Connection or Session.
+    """
+    return conn.execute(text("SELECT version FROM sync_state WHERE id = 1")).scalar() or 0
+
+
+def claim_version(conn) -> int:
+    """
+    Take the next version inside the caller's transaction. The UPDATE also takes
+    the write lock, so concurrent loaders never share a version.
+    """
+    if conn.execute(text(_NEXT_VERSION_SQL)).rowcount == 0:
+        conn.execute(text("INSERT INTO sync_state (id, version) VALUES (1, 1)"))
+    return current_version(conn)
+
+
+def release_if_unused(conn, version: int):
+    """
+    Give back a claimed version no row was stamped with (a load that inserted nothing).
+    """
+    for table in TRACKED_TABLES:
+        if conn.execute(text(f"SELECT 1 FROM {table} WHERE version = :v LIMIT 1"), {"v": version}).first():
+            return
+    conn.execute(text("UPDATE sync_state SET version = version - 1 WHERE id = 1 AND version = :v"),
+                 {"v": version})
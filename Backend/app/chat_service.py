@@ -1,68 +1,159 @@
 from sqlalchemy.orm import Session
-from app import crud, models
+from app import crud, models, search, vector_index
 from app.models import Country, CulturalDetail
+from app.answer_cache import answer_cache as default_answer_cache, normalize_message
+from app.catalog import catalog as default_catalog
+from app.config import settings
+from app.snapshot import snapshot_store
+from app.intent_classifier import default_classifier
 import random
+import re
+
+LINE_RE = re.compile(r"[^\n]*\n*")
 
 class ChatService:
     """
     Service to handle cultural chat logic using an improved semantic intent approach.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, catalog=None, classifier=None, vectors=None, answers=None):
         self.db = db
+        # Country lookups are served from the in-memory catalog, not the database
+        self.catalog = catalog or default_catalog
+        self.catalog.ensure_loaded(db)
+        self.classifier = classifier or default_classifier
+        # Vector retrieval needs NumPy; without it free-form questions use full-text search
+        self.vectors = vectors or vector_index.vector_index
+        if vector_index.available():
+            self.vectors.ensure_loaded(db, self.catalog.data_version)
+        # Details fetched during this service's lifetime, keyed by country id
+        self._details = {}
+        # Retrieval results keyed by (message, country id), filled in batches
+        self._retrieved = {}
+        # Finished answers shared across requests
+        self.answers = answers or default_answer_cache
+
+    def snapshot(self):
+        """
+        Tool: The shared read-only snapshot, if it holds the same data as the catalog.
+        """
+        snapshot = snapshot_store.current()
+        if snapshot is not None and snapshot.data_version == self.catalog.data_version:
+            return snapshot
+        return None
+
+    def get_details(self, country):
+        """
+        Tool: Cultural details for a country, fetched at most once per ChatService.
+        """
+        if country.id not in self._details:
+            snapshot = self.snapshot()
+            if snapshot is not None:
+                self._details[country.id] = snapshot.details(country.id)
+            else:
+                self._details[country.id] = crud.get_cultural_details(self.db, country.id)
+        return self._details[country.id]
+
+    def prefetch_details(self, countries):
+        """
+        Tool: Load details for several countries in a single query (or straight from the snapshot).
+        """
+        missing = {c.id for c in countries if c is not None and c.id not in self._details}
+        if not missing:
+            return
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            self._details.update({country_id: snapshot.details(country_id) for country_id in missing})
+        else:
+            self._details.update(crud.get_cultural_details_for_countries(self.db, missing))
 
     def detect_country(self, message: str, current_context_name: str):
         """
         Tool: Determine the target country based on message content or current context.
         """
-        message = message.lower()
-        all_countries = crud.get_all_countries(self.db)
-        
-        # 1. Message Override (Highest Priority)
-        for c in all_countries:
-            if c.name.lower() in message:
-                return c
+        # 1. Message Override (Highest Priority) - first country mentioned wins
+        mentioned = self.detect_countries(message)
+        if mentioned:
+            return mentioned[0]
 
         # 2. Current Context (State)
         if current_context_name and current_context_name.lower() != "general":
-            return crud.get_country_by_name(self.db, current_context_name)
+            return self.catalog.resolve(current_context_name)
             
         return None
 
+    def detect_countries(self, message: str):
+        """
+        Tool: All countries (names or aliases) mentioned in the message, in order of appearance.
+        """
+        return self.catalog.detect(message)
+
     def analyze_intent(self, message: str):
         """
         Tool: Classify user intent into categories: GREETING, DO, DONT, TOP_TIPS, or OFF_TOPIC.
         """
-        msg_lower = message.lower()
-        
-        # 1. Greetings
-        if any(word in msg_lower for word in ["hello", "hi", "hey", "start", "begin", "good morning"]):
-            return "GREETING"
-            
-        # 2. Specific Intents
-        if any(word in msg_lower for word in ["do", "allowed", "okay", "can i", "should i"]):
-            return "DO"
-        if any(word in msg_lower for word in ["don't", "avoid", "illegal", "rude", "forbidden", "never", "taboo", "bad"]):
-            return "DONT"
-        if any(word in msg_lower for word in ["tip", "guide", "advice", "help", "summary", "best practice", "tell me", "know about", "what is"]):
-            return "TOP_TIPS"
-            
-        # 3. Off-Topic Filtering (Relaxed)
-        # If the message mentions a country but no specific intent, default to TOP_TIPS
-        # Only strict off-topic if it looks like math/spam
-        
-        off_topic_indicators = ["math", "calculation", "weather", "physics", "code"]
-        if any(word in msg_lower for word in off_topic_indicators):
-            return "OFF_TOPIC"
-            
-        # Default fallback for ambiguous but safe queries
-        return "TOP_TIPS" 
+        return self.classify_intent(message).intent
+
+    def classify_intent(self, message: str):
+        """
+        Tool: Intent plus confidence score. Keyword tables live in intent_keywords.json;
+        ambiguous but safe queries default to TOP_TIPS.
+        """
+        return self.classifier.classify(message)
+
+    def query_terms(self, message: str, country=None):
+        """
+        Tool: Search terms of a message. Country names/aliases are not search terms.
+        """
+        ignore = set()
+        for mentioned in self.detect_countries(message) + ([country] if country else []):
+            ignore.update(search.search_terms(mentioned.name))
+        return search.search_terms(message, ignore)
+
+    def search_details(self, message: str, country, limit: int = 3):
+        """
+        Tool: Full-text search within the country's rules.
+        """
+        terms = self.query_terms(message, country)
+        return search.search(self.db, " ".join(terms), country_id=country.id, limit=limit)
+
+    def retrieve_details(self, pairs, limit: int = 3):
+        """
+        Tool: Vector top-k for many (message, country) pairs in one batch; a None
+        country searches all countries. Returns [(detail, score), ...] per pair.
+        """
+        if not vector_index.available() or not self.vectors.loaded:
+            return [[] for _ in pairs]
+        terms = [self.query_terms(message, country) for message, country in pairs]
+        scopes = [country.id if country else None for _, country in pairs]
+        results = self.vectors.query([" ".join(t) for t in terms], scopes, k=limit)
+
+        hit_countries = {h.country_id for hits in results for h in hits}
+        self.prefetch_details([self.catalog.get(country_id) for country_id in hit_countries])
+        by_id = {d.id: d for country_id in hit_countries for d in self._details.get(country_id, ())}
+        answers = []
+        for query, scope, hits in zip(terms, scopes, results):
+            threshold = settings.vector_min_score if scope is not None else settings.vector_global_min_score
+            # Shared character trigrams alone ("bowls" ~ "Bow") are not an answer; a word must match too
+            answers.append([(by_id[h.detail_id], h.score) for h in hits
+                            if h.score >= threshold and h.detail_id in by_id
+                            and search.shares_word(query, vector_index.detail_text(by_id[h.detail_id]))])
+        return answers
+
+    def retrieve(self, message: str, country):
+        """
+        Tool: Vector top-k for a single message (served from the batch results when prefetched).
+        """
+        key = (message, country.id if country else None)
+        if key not in self._retrieved:
+            self._retrieved[key] = self.retrieve_details([(message, country)])[0]
+        return self._retrieved[key]
 
     def get_fallback_content(self, country):
         """
         Tool: Fetch 'Top Tips' (General Fallback).
         """
-        details = crud.get_cultural_details(self.db, country.id)
+        details = self.get_details(country)
         
         # Priority: Greeting -> ETIQUETTE -> DINING
         priorities = ["GREETING", "ETIQUETTE", "DINING"]
@@ -78,28 +169,133 @@ class ChatService:
             
         return "\n\n".join(top_tips)
 
-    def process_message(self, message: str, current_country_name: str):
+    def process_batch(self, items):
         """
-        Orchestrator: Coordinates the tools to generate a response.
+        Orchestrator: Answer many (message, country) pairs against one data snapshot.
+        Countries are resolved up front so each country's details are fetched only once,
+        and only for the answers that are not cached yet.
+        """
+        version = self.catalog.data_version
+        targets = [self.detect_country(message, country_name) for message, country_name in items]
+        intents = [self.analyze_intent(message) for message, _ in items]
+        keys = [self.answer_key(message, target, intent)
+                for (message, _), target, intent in zip(items, targets, intents)]
+        answers = [self.answers.get(version, key) for key in keys]
+        todo = [i for i, answer in enumerate(answers) if answer is None]
+
+        self.prefetch_details([targets[i] for i in todo])
+        # Free-form questions are embedded and scored together
+        pending = list(dict.fromkeys(
+            (items[i][0], targets[i]) for i in todo if intents[i] in ("TOP_TIPS", "GENERAL_INFO")
+        ))
+        for (message, target), hits in zip(pending, self.retrieve_details(pending)):
+            self._retrieved[(message, target.id if target else None)] = hits
+
+        computed = {}
+        for i in todo:
+            if keys[i] not in computed:
+                computed[keys[i]] = self.compose_answer(items[i][0], targets[i], intents[i])
+                self.answers.put(version, keys[i], computed[keys[i]])
+            answers[i] = computed[keys[i]]
+        return [dict(answer) for answer in answers]
+
+    def resolve_target(self, message: str, current_country_name, session=None):
+        """
+        Tool: Target country of a turn. Without a country in the request ("General" or
+        none) the session's active country is the context.
         """
-        # 1. Detect Country
         target_country = self.detect_country(message, current_country_name)
-        
+        if target_country is None and session is not None and session.country_id is not None and (
+                not current_country_name or current_country_name.lower() == "general"):
+            target_country = self.catalog.get(session.country_id)
+        return target_country
+
+    def remember_turn(self, session, message: str, target_country):
+        session.remember(target_country, self.analyze_intent(message))
+
+    def process_turn(self, message: str, current_country_name, session):
+        """
+        Orchestrator: process_message inside a chat session.
+        """
+        target_country = self.resolve_target(message, current_country_name, session)
+        answer = self.process_message(message, current_country_name, target_country=target_country)
+        self.remember_turn(session, message, target_country)
+        return answer
+
+    def stream_turn(self, message: str, current_country_name, session=None):
+        """
+        Orchestrator: The answer as a generator of (event, data) pairs. The active
+        country comes first (resolved from memory, before any database work), then
+        the response text line by line, then "done".
+        """
+        target_country = self.resolve_target(message, current_country_name, session)
+        yield "country", {
+            "active_country": target_country.name if target_country else None,
+            "session_id": session.id if session is not None else None,
+        }
+
+        answer = self.process_message(message, current_country_name, target_country=target_country)
+        # One event per line, blank lines stay attached to the line before them
+        for piece in LINE_RE.findall(answer["response"]):
+            if piece:
+                yield "message", {"text": piece}
+
+        if session is not None:
+            self.remember_turn(session, message, target_country)
+        yield "done", {}
+
+    def answer_key(self, message: str, country, intent: str):
+        """
+        Tool: Cache key of an answer. The answer depends only on the words of the
+        message, the resolved country and the intent.
+        """
+        return (normalize_message(message), country.id if country else None, intent)
+
+    def process_message(self, message: str, current_country_name: str, target_country=None):
+        """
+        Orchestrator: Coordinates the tools to generate a response. Repeated questions
+        are served from the answer cache.
+        """
+        # 1. Detect Country (unless the caller already resolved it)
+        if target_country is None:
+            target_country = self.detect_country(message, current_country_name)
+
+        # 2. Analyze Intent
+        intent = self.analyze_intent(message)
+
+        version = self.catalog.data_version
+        key = self.answer_key(message, target_country, intent)
+        answer = self.answers.get(version, key)
+        if answer is None:
+            answer = self.compose_answer(message, target_country, intent)
+            self.answers.put(version, key, answer)
+        # Callers may add fields (e.g. session ids); never hand out the cached dict
+        return dict(answer)
+
+    def compose_answer(self, message: str, target_country, intent: str):
+        """
+        Orchestrator: Build the answer for an already resolved country and intent.
+        """
         if not target_country:
             # If no country context at all, just chat generally
-            if "hi" in message.lower() or "hello" in message.lower():
+            if intent == "GREETING":
                  return {
                      "response": "Hi! I'm GeoPulse. Mention a country (like 'Japan' or 'Brazil') and I'll share local customs!",
                      "active_country": None
                  }
+            # A clear match anywhere in the world still answers the question
+            hits = self.retrieve(message, None) if intent != "OFF_TOPIC" else []
+            if hits:
+                 return {
+                     "response": "🔎 **Around the world**:\n\n" + "\n\n".join(
+                         [f"🔹 **{self.catalog.get(d.country_id).name} – {d.topic}**: {d.description}" for d, _ in hits]),
+                     "active_country": None
+                 }
             return {
                 "response": "I can help with cultural guides. Which country are you curious about?",
                 "active_country": None
             }
-            
-        # 2. Analyze Intent
-        intent = self.analyze_intent(message)
-        
+
         # Handle Off-Topic
         if intent == "OFF_TOPIC":
             return {
@@ -108,7 +304,7 @@ class ChatService:
             }
 
         # 3. Search Knowledge Base
-        details = crud.get_cultural_details(self.db, target_country.id)
+        details = self.get_details(target_country)
         
         response_text = ""
         
@@ -130,9 +326,17 @@ class ChatService:
                   response_text = f"Just be polite! I don't have specific taboos recorded for {target_country.name}."
 
         else: # TOP_TIPS / GENERAL_INFO
-             # Provide a nice summary
-             summary = self.get_fallback_content(target_country)
-             response_text = f"🌏 **{target_country.name} Cultural Snapshot**:\n\n{summary}\n\n*Try asking: 'Can I tip here?'*"
+             # Free-form questions ("tipping in restaurants?") get the best matching rules
+             matches = [d for d, _ in self.retrieve(message, target_country)]
+             if not matches:
+                  matches = self.search_details(message, target_country)
+             if matches:
+                  response_text = f"🔎 **{target_country.name}**:\n\n" + "\n\n".join(
+                      [f"🔹 **{d.topic}**: {d.description}" for d in matches])
+             else:
+                  # Provide a nice summary
+                  summary = self.get_fallback_content(target_country)
+                  response_text = f"🌏 **{target_country.name} Cultural Snapshot**:\n\n{summary}\n\n*Try asking: 'Can I tip here?'*"
              
         return {
             "response": response_text,
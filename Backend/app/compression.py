@@ -0,0 +1,145 @@
+"""
+Negotiated gzip/brotli response compression.
+
+CompressionMiddleware compresses any complete (non-streaming) response
+above a size threshold. Endpoints that serve cacheable bytes (guides) can
+instead pick a pre-compressed variant themselves; responses that already
+carry a Content-Encoding are passed through untouched.
+"""
+import gzip
+from typing import Optional
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Best encoding we support from an Accept-Encoding header (br preferred on equal q).
+    """
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[token.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+    raise ValueError(f"Unsupported encoding '{encoding}'")
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    # Each encoded representation needs its own strong validator: "abc" -> "abc-gzip"
+    return etag[:-1] + "-" + encoding + '"' if etag.endswith('"') else etag
+
+
+def strip_variant(etag: str) -> str:
+    for encoding in ("br", "gzip"):
+        suffix = "-" + encoding + '"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware, so streamed responses (SSE) are never buffered.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start_message, body):
+                # Streaming or not worth it: send as-is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [(k, v) for k, v in start_message["headers"]
+                       if k not in (b"content-length", b"etag", b"vary")]
+            vary = [b"Accept-Encoding"]
+            for k, v in start_message["headers"]:
+                if k == b"etag":
+                    headers.append((b"etag", variant_etag(v.decode("latin-1"), encoding).encode("latin-1")))
+                elif k == b"vary":
+                    vary.insert(0, v)
+            headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", b", ".join(vary)),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message, body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        content_type = b""
+        for k, v in start_message["headers"]:
+            if k == b"content-encoding":
+                return False
+            if k == b"content-type":
+                content_type = v
+        return content_type.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,108 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+class CountryDetector:
+    """
+    Aho-Corasick automaton over country names and aliases.
+
+    Finds every mentioned place in a single pass over the message, only
+    accepting matches that sit on word boundaries ("Oman" does not match
+    inside "woman"). Overlapping hits resolve leftmost-longest, so
+    "South Sudan" wins over "Sudan".
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        # Node 0 is the root. goto[n] maps a character to the next node.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # For each node: (pattern length, value) of every pattern ending here
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, value in patterns:
+            key = self.normalize(pattern)
+            if key:
+                self._add(key, value)
+        self._build()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.casefold().split())
+
+    def _add(self, key: str, value):
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(key), value))
+
+    def _build(self):
+        # Breadth-first pass to compute failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        Return non-overlapping (start, end, value) matches ordered by position.
+        Offsets refer to the normalized text.
+        """
+        text = self.normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            for length, value in out[node]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < n and _is_word_char(text[end]):
+                    continue
+                hits.append((start, end, value))
+
+        # Leftmost-longest, non-overlapping
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        matches = []
+        last_end = 0
+        for start, end, value in hits:
+            if start >= last_end:
+                matches.append((start, end, value))
+                last_end = end
+        return matches
+
+    def detect(self, text: str) -> List[Any]:
+        """
+        Distinct matched values, ranked by first mention in the text.
+        """
+        seen = set()
+        ranked = []
+        for _, _, value in self.find_all(text):
+            if value not in seen:
+                seen.add(value)
+                ranked.append(value)
+        return ranked
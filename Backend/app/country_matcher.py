@@ -0,0 +1,157 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def trigrams(key: str) -> set:
+    # Padding makes the first and last letters count ("japn" still shares "  j", " ja")
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein distance (adjacent transpositions count as one edit),
+    giving up with limit + 1 as soon as the distance must exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def max_edits(key: str) -> int:
+    # Short names tolerate one typo, longer ones two ("Phillipines"), very long ones three
+    if len(key) <= 5:
+        return 1
+    if len(key) <= 12:
+        return 2
+    return 3
+
+
+class FuzzyIndex:
+    """
+    Trigram index over normalized names for typo-tolerant lookups.
+
+    Candidates come from shared trigrams (cheap, any misspelling position),
+    then the best ones are checked with a bounded edit distance. Several keys
+    (names and aliases) may map to the same value; each value is returned once.
+    """
+
+    CANDIDATES = 30
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]]):
+        self._keys: List[str] = []
+        self._values: List[Any] = []
+        self._grams: List[set] = []
+        self._postings: Dict[str, List[int]] = {}
+        for key, value in entries:
+            index = len(self._keys)
+            grams = trigrams(key)
+            self._keys.append(key)
+            self._values.append(value)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(index)
+
+    def search(self, key: str, limit: int = 5, min_similarity: float = 0.25) -> List[Tuple[Any, int, float]]:
+        """
+        (value, edit distance, trigram similarity) for the closest keys, best first.
+        Distances above max_edits(key) are reported as max_edits(key) + 1.
+        """
+        if not key:
+            return []
+        query_grams = trigrams(key)
+        shared = Counter()
+        for gram in query_grams:
+            for index in self._postings.get(gram, ()):
+                shared[index] += 1
+
+        scored = []
+        for index, count in shared.items():
+            similarity = count / (len(query_grams) + len(self._grams[index]) - count)
+            if similarity >= min_similarity:
+                scored.append((similarity, index))
+        scored.sort(reverse=True)
+
+        limit_edits = max_edits(key)
+        best: Dict[int, Tuple[int, float, str]] = {}
+        for similarity, index in scored[:self.CANDIDATES]:
+            distance = edit_distance(key, self._keys[index], limit_edits)
+            value = self._values[index]
+            rank = (distance, -similarity, self._keys[index])
+            if id(value) not in best or rank < best[id(value)][0]:
+                best[id(value)] = (rank, value)
+        ranked = sorted(best.values(), key=lambda item: item[0])
+        return [(value, rank[0], -rank[1]) for rank, value in ranked[:limit]]
+
+    def correct(self, key: str) -> Optional[Any]:
+        """
+        The single value key is an obvious misspelling of, or None if there is no
+        close match or two values are equally close.
+        """
+        matches = self.search(key, limit=2)
+        if not matches or matches[0][1] > max_edits(key):
+            return None
+        if len(matches) > 1 and matches[1][1] == matches[0][1]:
+            return None
+        return matches[0][0]
+
+
+class PrefixTrie:
+    """
+    Autocomplete over names. Every node keeps its top `k` completions, so a
+    lookup walks len(prefix) nodes and returns a ready list.
+
+    Names are also reachable from the start of each later word ("korea" finds
+    "South Korea"), ranked after names that start with the prefix.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any, str]], k: int = 20):
+        """
+        entries: (normalized key, value, display name). Aliases use the key of the
+        alias and the display name of the country they point to.
+        """
+        self.k = k
+        self._children: List[Dict[str, int]] = [{}]
+        candidates: List[Dict[int, Tuple[tuple, Any]]] = [{}]
+
+        for key, value, display in entries:
+            words = key.split(" ")
+            for position in range(len(words)):
+                suffix = " ".join(words[position:])
+                rank = (1 if position else 0, display.casefold())
+                node = 0
+                for ch in suffix:
+                    nxt = self._children[node].get(ch)
+                    if nxt is None:
+                        nxt = self._children[node][ch] = len(self._children)
+                        self._children.append({})
+                        candidates.append({})
+                    node = nxt
+                    current = candidates[node].get(id(value))
+                    if current is None or rank < current[0]:
+                        candidates[node][id(value)] = (rank, value)
+
+        self._top: List[Tuple[Any, ...]] = [
+            tuple(value for _, value in sorted(c.values(), key=lambda item: item[0])[:k])
+            for c in candidates
+        ]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Any]:
+        node = 0
+        for ch in prefix:
+            node = self._children[node].get(ch)
+            if node is None:
+                return []
+        return list(self._top[node][:limit])
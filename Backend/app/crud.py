@@ -1,16 +1,68 @@
-from sqlalchemy.orm import Session
-from . import models
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from . import changes, models
 
 def get_country_by_name(db: Session, country_name: str):
     # Case-insensitive lookup
     country = db.query(models.Country).filter(models.Country.name == country_name).first()
     if not country:
-        # Fallback to case-insensitive match
-        country = db.query(models.Country).filter(models.Country.name.ilike(country_name)).first()
+        # Fallback to case-insensitive match (served by ix_countries_name_lower)
+        country = db.query(models.Country).filter(func.lower(models.Country.name) == country_name.lower()).first()
     return country
 
 def get_cultural_details(db: Session, country_id: int):
-    return db.query(models.CulturalDetail).filter(models.CulturalDetail.country_id == country_id).all()
+    return (
+        db.query(models.CulturalDetail)
+        .filter(models.CulturalDetail.country_id == country_id)
+        .order_by(models.CulturalDetail.id)
+        .all()
+    )
+
+def get_countries_with_details(db: Session, country_ids):
+    # Countries and their details in a single joined query (no N+1 over countries)
+    return (
+        db.query(models.Country)
+        .options(joinedload(models.Country.details))
+        .filter(models.Country.id.in_(list(country_ids)))
+        .all()
+    )
+
+def get_quiz_questions(db: Session, country_id: int):
+    return db.query(models.QuizQuestion).filter(models.QuizQuestion.country_id == country_id).all()
+
+def get_all_quiz_questions(db: Session):
+    return db.query(models.QuizQuestion).order_by(models.QuizQuestion.country_id, models.QuizQuestion.id).all()
+
+def get_all_cultural_details(db: Session):
+    # Grouped by country so each country's rows are contiguous (see vector_index)
+    return db.query(models.CulturalDetail).order_by(models.CulturalDetail.country_id, models.CulturalDetail.id).all()
 
 def get_all_countries(db: Session):
     return db.query(models.Country).all()
+
+def get_data_version(db: Session):
+    # The sync counter moves on every bulk load and (via the SQLite triggers) every
+    # insert, edit and delete, so one primary-key read tells the caches to reload
+    return changes.current_version(db)
+
+def get_changed_rows(db: Session, model, since: int):
+    # Rows stamped after `since` (served by the version index)
+    return db.query(model).filter(model.version > since).order_by(model.id).all()
+
+def get_tombstones(db: Session, since: int):
+    return db.query(models.Tombstone).filter(models.Tombstone.version > since).order_by(models.Tombstone.id).all()
+
+def get_cultural_details_for_countries(db: Session, country_ids):
+    # One round trip for many countries, grouped by country_id
+    grouped = {country_id: [] for country_id in country_ids}
+    if not grouped:
+        return grouped
+    rows = (
+        db.query(models.CulturalDetail)
+        .filter(models.CulturalDetail.country_id.in_(list(grouped)))
+        .order_by(models.CulturalDetail.country_id, models.CulturalDetail.id)
+        .all()
+    )
+    for d in rows:
+        grouped[d.country_id].append(d)
+    return grouped
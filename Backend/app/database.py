@@ -1,14 +1,88 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Place database in the parent directory (Backend/)
-DB_PATH = os.path.join(BASE_DIR, "..", "cultural.db")
+from .config import settings
 
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+# Async drivers used for each sync URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' URLs; set GEOPULSE_ASYNC_DATABASE_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _pool_options(url):
+    # In-memory SQLite uses a singleton pool that takes no sizing options
+    if _is_sqlite_memory(url):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _apply_sqlite_pragmas(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+        cursor.close()
+
+
+def build_engine(database_url: str = None):
+    """
+    Sync engine for the configured database (SQLite gets WAL + pragma tuning).
+    """
+    url = make_url(database_url or settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        engine = create_engine(url, connect_args={"check_same_thread": False}, **_pool_options(url))
+        _apply_sqlite_pragmas(engine)
+        return engine
+    return create_engine(url, **_pool_options(url))
+
+
+def build_async_engine(database_url: str = None):
+    """
+    Async engine matching build_engine(); the URL is derived from the sync one unless set explicitly.
+    """
+    url = make_url(database_url or settings.async_database_url or to_async_url(settings.database_url))
+    options = _pool_options(url)
+    if url.get_backend_name() == "sqlite":
+        # aiosqlite defaults to NullPool; pool explicitly so connections are reused and the limits apply
+        if options:
+            options["poolclass"] = AsyncAdaptedQueuePool
+        engine = create_async_engine(url, **options)
+        _apply_sqlite_pragmas(engine.sync_engine)
+        return engine
+    return create_async_engine(url, **options)
+
+
+DATABASE_URL = settings.database_url
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Used by the async API endpoints
+async_engine = build_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
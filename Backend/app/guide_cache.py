@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from typing import Dict, Hashable, Optional
+
+import orjson
+
+from .compression import compress, strip_variant
+
+
+def serialize(data) -> bytes:
+    # Compact UTF-8 JSON, byte-compatible with FastAPI's JSON responses
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def build_guide(country, details) -> dict:
+    # Transform data for frontend
+    return {
+        "country": country.name,
+        "language": country.language,
+        "details": [
+            {
+                "category": d.category,
+                "topic": d.topic,
+                "description": d.description,
+                "is_strict": d.is_strict
+            } for d in details
+        ]
+    }
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against a strong ETag (weak comparison, RFC 9110).
+    Validators of compressed variants ("abc-gzip") match their identity ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if strip_variant(candidate) == etag:
+            return True
+    return False
+
+
+class CachedPayload:
+    """
+    Serialized JSON body + ETag, with compressed variants built on first use.
+    """
+    __slots__ = ("body", "etag", "_variants")
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self._variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = self._variants[encoding] = compress(self.body, encoding)
+        return variant
+
+
+class PayloadCache:
+    """
+    Finished JSON bytes + ETag for cacheable responses (e.g. each country's guide).
+
+    Entries are tied to a data version (callers pass catalog.data_version).
+    The catalog re-reads the database's version every few seconds, so after a
+    re-seed or an edit the first request with the new version drops the whole
+    cache. ETags are content hashes, so unchanged guides still revalidate.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, CachedPayload] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, version, key: Hashable) -> Optional[CachedPayload]:
+        if version != self._version:
+            return None
+        return self._entries.get(key)
+
+    def put(self, version, key: Hashable, data) -> CachedPayload:
+        body = serialize(data)
+        payload = CachedPayload(body, make_etag(body))
+        with self._lock:
+            if version != self._version:
+                self._entries = {}
+                self._version = version
+            self._entries[key] = payload
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._version = None
+
+
+# Guides keyed by country id
+guide_cache = PayloadCache()
+# Other cacheable listings (e.g. /api/countries)
+payload_cache = PayloadCache()
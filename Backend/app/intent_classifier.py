@@ -0,0 +1,80 @@
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_KEYWORDS_PATH = os.path.join(BASE_DIR, "intent_keywords.json")
+
+# Words, keeping inner apostrophes so "don't" stays one token
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+class IntentResult(NamedTuple):
+    intent: str
+    confidence: float
+
+
+def tokenize(message: str) -> List[str]:
+    return TOKEN_RE.findall(message.casefold().replace("’", "'"))
+
+
+class IntentClassifier:
+    """
+    Keyword classifier compiled into a single hashed n-gram table.
+
+    The message is tokenized once; at each position the longest matching
+    n-gram is looked up, its per-intent weights are added and its tokens are
+    consumed (so "do not" counts for DONT only, never for DO). The highest
+    scoring intent wins, ties go to the earlier intent in `priority`.
+    """
+
+    def __init__(self, intents: Dict[str, Dict[str, float]], default: str, priority: Optional[List[str]] = None):
+        self.default = default
+        self.priority = priority or list(intents)
+        self._rank = {intent: i for i, intent in enumerate(self.priority)}
+        self._table: Dict[tuple, Dict[str, float]] = {}
+        self.max_ngram = 1
+        for intent, keywords in intents.items():
+            self._rank.setdefault(intent, len(self._rank))
+            for phrase, weight in keywords.items():
+                key = tuple(tokenize(phrase))
+                if not key:
+                    continue
+                self._table.setdefault(key, {})[intent] = float(weight)
+                self.max_ngram = max(self.max_ngram, len(key))
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_KEYWORDS_PATH) -> "IntentClassifier":
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config["intents"], config["default"], config.get("priority"))
+
+    def scores(self, message: str) -> Dict[str, float]:
+        tokens = tokenize(message)
+        table = self._table
+        n = len(tokens)
+        totals: Dict[str, float] = {}
+        i = 0
+        while i < n:
+            for size in range(min(self.max_ngram, n - i), 0, -1):
+                weights = table.get(tuple(tokens[i:i + size]))
+                if weights:
+                    for intent, weight in weights.items():
+                        totals[intent] = totals.get(intent, 0.0) + weight
+                    i += size
+                    break
+            else:
+                i += 1
+        return totals
+
+    def classify(self, message: str) -> IntentResult:
+        totals = self.scores(message)
+        if not totals:
+            return IntentResult(self.default, 0.0)
+        rank = self._rank
+        intent = max(totals, key=lambda k: (totals[k], -rank[k]))
+        return IntentResult(intent, round(totals[intent] / sum(totals.values()), 3))
+
+
+default_classifier = IntentClassifier.from_file()
@@ -0,0 +1,101 @@
+"""
+Startup lifecycle: schema upgrade, background warm-up and readiness.
+
+Importing the app touches neither the database nor any optional heavy
+dependency. The FastAPI lifespan (see main.py) runs the schema upgrade
+(unless GEOPULSE_AUTO_MIGRATE=false, e.g. when deploys run
+`python -m app.migrations` instead). It then loads the in-memory subsystems
+in a background thread. Requests are served right away, since every
+subsystem also loads lazily on first use, and /ready reports 503 until the
+warm-up has finished.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import database, vector_index
+from .catalog import catalog
+from .quiz_bank import quiz_bank
+from .snapshot import snapshot_store
+
+logger = logging.getLogger("geopulse.lifecycle")
+
+# Set when this module is first imported, i.e. while the app is being imported
+PROCESS_STARTED = time.perf_counter()
+
+
+class Readiness:
+    """
+    Per-component warm-up status: pending -> loading -> ready | failed.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.ready_after: Optional[float] = None  # seconds since PROCESS_STARTED
+
+    def set(self, name: str, status: str, seconds: Optional[float] = None, error: Optional[str] = None):
+        with self._lock:
+            entry = self._components.setdefault(name, {})
+            entry["status"] = status
+            if seconds is not None:
+                entry["seconds"] = round(seconds, 4)
+            if error:
+                entry["error"] = error
+
+    def finish(self):
+        self.ready_after = time.perf_counter() - PROCESS_STARTED
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_after is not None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            components = {name: dict(entry) for name, entry in self._components.items()}
+        return {
+            "ready": self.ready,
+            "ready_after_seconds": round(self.ready_after, 4) if self.ready else None,
+            "components": components,
+        }
+
+
+readiness = Readiness()
+
+
+def warm_up_steps() -> List[Tuple[str, Callable]]:
+    steps = [("catalog", catalog.ensure_loaded), ("quiz_bank", quiz_bank.ensure_loaded)]
+    if snapshot_store.enabled:
+        # First, so the catalog and quiz bank map it instead of reading the database
+        steps.insert(0, ("snapshot", snapshot_store.ensure_current))
+    if vector_index.available():
+        # Maps the on-disk artifact, or rebuilds it if the data has changed
+        steps.append(("vector_index", vector_index.vector_index.ensure_loaded))
+    return steps
+
+
+def warm_up(steps: Optional[List[Tuple[str, Callable]]] = None):
+    """
+    Load every in-memory subsystem once. A failing step is logged and marked
+    failed; the affected subsystem retries lazily on its next use.
+    """
+    steps = warm_up_steps() if steps is None else steps
+    for name, _ in steps:
+        readiness.set(name, "pending")
+    db = database.SessionLocal()
+    try:
+        for name, load in steps:
+            readiness.set(name, "loading")
+            started = time.perf_counter()
+            try:
+                load(db)
+            except Exception as e:
+                logger.exception("Warm-up of %s failed", name)
+                readiness.set(name, "failed", time.perf_counter() - started, error=str(e))
+            else:
+                readiness.set(name, "ready", time.perf_counter() - started)
+    finally:
+        db.close()
+    readiness.finish()
+    logger.info("Warm-up finished %.0fms after start", readiness.ready_after * 1000)
@@ -1,123 +1,464 @@
-from fastapi import FastAPI, HTTPException, Depends
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import anyio
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from . import models, crud, database
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, database
+from .catalog import catalog
+from .quiz_bank import quiz_bank
+from . import bundle, changes, search, lifecycle, migrations
+from .guide_cache import guide_cache, payload_cache, build_guide, etag_matches, serialize
+from .compression import CompressionMiddleware, negotiate_encoding, variant_etag
+from .config import settings
+from .metrics import MetricsMiddleware, instrument_engine, registry
+from .answer_cache import answer_cache
+from .sessions import session_store
+from .admission import AdmissionMiddleware, admission_controller
+from .attempts import Attempt, attempt_recorder, now as utc_now
+from .snapshot import snapshot_store
 
-models.Base.metadata.create_all(bind=database.engine)
+@asynccontextmanager
+async def lifespan(app):
+    # Schema work happens here (or in `python -m app.migrations`), never at import time
+    if settings.auto_migrate:
+        await anyio.to_thread.run_sync(migrations.upgrade)
+    attempt_recorder.start()
+    # Catalog, quiz banks and vectors load in the background; /ready flips once they're in
+    if settings.warm_up_in_background:
+        threading.Thread(target=lifecycle.warm_up, name="geopulse-warm-up", daemon=True).start()
+    else:
+        await anyio.to_thread.run_sync(lifecycle.warm_up)
+    try:
+        yield
+    finally:
+        # Write out queued quiz attempts before the process goes away
+        await anyio.to_thread.run_sync(attempt_recorder.stop)
+        # aiosqlite keeps a thread per pooled connection; close them or the process can't exit
+        await database.async_engine.dispose()
 
-app = FastAPI()
+# orjson for every response; hot endpoints return ORJSONResponse directly to skip jsonable_encoder
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
+# Inside CORS, so 429/503 rejections still carry CORS headers and preflights aren't limited
+app.add_middleware(AdmissionMiddleware)
 # Allow React frontend to connect
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"], # Allow all for local dev convenience
+    allow_origins=settings.cors_allow_origins, # "*" by default for local dev convenience
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paged quiz responses carry the bank size; browsers hide other headers from scripts
+    expose_headers=["X-Total-Count"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+# Outermost, so latency includes compression and CORS handling
+app.add_middleware(MetricsMiddleware)
+instrument_engine(database.engine)
+instrument_engine(database.async_engine.sync_engine)
+registry.register_collector(answer_cache.collect)
+registry.register_collector(session_store.collect)
+registry.register_collector(attempt_recorder.collect)
+registry.register_collector(admission_controller.collect)
 
 # Dependency
-def get_db():
-    db = database.SessionLocal()
-    try:
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+@app.get("/health", include_in_schema=False)
+def health():
+    # Liveness: the process is up and serving
+    return {"status": "ok"}
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    # Readiness: warm-up finished (503 until then), with per-component timings
+    state = lifecycle.readiness.snapshot()
+    return ORJSONResponse(state, status_code=200 if state["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def cached_response(payload, if_none_match, accept_encoding):
+    """
+    Response for a cached payload: 304 on a matching validator, otherwise the
+    identity body or its memoized gzip/brotli variant.
+    """
+    headers = {"ETag": payload.etag, "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+    encoding = None
+    if len(payload.body) >= settings.compression_minimum_size:
+        encoding = negotiate_encoding(accept_encoding)
+    if encoding:
+        headers["ETag"] = variant_etag(payload.etag, encoding)
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=payload.encoded(encoding), media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+def country_not_found(name: str):
+    # 404 with the closest names, so clients can offer "did you mean ...?"
+    return ORJSONResponse(status_code=404, content={
+        "detail": f"Country '{name}' not found",
+        "suggestions": [c.name for c in catalog.suggest(name)],
+    })
+
+def snapshot_guide(country_id: int):
+    # Guide bytes straight from the shared snapshot, when it matches the catalog
+    snapshot = snapshot_store.current()
+    if snapshot is not None and snapshot.data_version == catalog.data_version:
+        return snapshot.guide(country_id)
+    return None
 
 @app.get("/api/guide/{country}")
-def get_guide(country: str, db: Session = Depends(get_db)):
-    # Normalize input: "india" -> "India", "usa" -> "United States" (handling aliases could be added here)
-    # Normalize input: strip whitespace
+async def get_guide(
+    country: str,
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
     # We do NOT employ .title() because it breaks names like "Antigua and Barbuda" -> "Antigua And Barbuda"
-    # The frontend sends the correct name from the dropdown. 
-    # For manual URL entry we will rely on a case-insensitive search in CRUD.
+    # Aliases ("usa", "uk", ...), case/whitespace differences and plain typos are handled by the catalog.
     search_name = country.strip()
-    
-    # Handle common aliases (manual overrides if needed)
-    aliases = {
-        "usa": "United States",
-        "us": "United States",
-        "america": "United States",
-        "uk": "United Kingdom",
-        "uae": "United Arab Emirates"
-    }
-    # Check alias case-insensitively
-    if search_name.lower() in aliases:
-        search_name = aliases[search_name.lower()]
-
-    country_obj = crud.get_country_by_name(db, search_name)
+
+    await catalog.ensure_loaded_async(db)
+    country_obj = catalog.resolve_fuzzy(search_name)
     if not country_obj:
-        raise HTTPException(status_code=404, detail=f"Country '{search_name}' not found")
-    
-    details = crud.get_cultural_details(db, country_obj.id)
-    
-    # Transform data for frontend
-    response_data = {
-        "country": country_obj.name,
-        "language": country_obj.language,
-        "details": [
-            {
-                "category": d.category,
-                "topic": d.topic,
-                "description": d.description,
-                "is_strict": d.is_strict
-            } for d in details
-        ]
-    }
-    return response_data
+        return country_not_found(search_name)
+
+    # Guides only change when the data is re-seeded, so serve pre-serialized bytes
+    payload = snapshot_guide(country_obj.id) or guide_cache.get(catalog.data_version, country_obj.id)
+    if payload is None:
+        details = await db.run_sync(crud.get_cultural_details, country_obj.id)
+        payload = guide_cache.put(catalog.data_version, country_obj.id, build_guide(country_obj, details))
+
+    return cached_response(payload, if_none_match, accept_encoding)
+
+MAX_GUIDES_PER_REQUEST = 50
+
+@app.get("/api/guides")
+async def get_guides(names: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Several guides at once, e.g. /api/guides?names=Japan,India. Guides come back in the
+    requested order; names that don't resolve are listed under "missing".
+    """
+    requested = [n.strip() for n in names.split(",") if n.strip()]
+    if len(requested) > MAX_GUIDES_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_GUIDES_PER_REQUEST} countries per request")
+
+    await catalog.ensure_loaded_async(db)
+    countries, missing = [], []
+    for name in requested:
+        country_obj = catalog.resolve_fuzzy(name)
+        if country_obj is None:
+            missing.append(name)
+        elif country_obj not in countries:
+            countries.append(country_obj)
+
+    version = catalog.data_version
+    payloads = {c.id: snapshot_guide(c.id) or guide_cache.get(version, c.id) for c in countries}
+    misses = [country_id for country_id, payload in payloads.items() if payload is None]
+    if misses:
+        for c in await db.run_sync(crud.get_countries_with_details, misses):
+            payloads[c.id] = guide_cache.put(version, c.id, build_guide(c, c.details))
+
+    # Splice the cached guide bytes straight into the response body
+    body = (b'{"guides":[' + b",".join(payloads[c.id].body for c in countries)
+            + b'],"missing":' + serialize(missing) + b"}")
+    return Response(content=body, media_type="application/json")
 
 @app.get("/api/countries")
-def get_countries(db: Session = Depends(get_db)):
-    countries = crud.get_all_countries(db)
-    return [{"id": c.id, "name": c.name} for c in countries]
+async def get_countries(
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    await catalog.ensure_loaded_async(db)
+    payload = payload_cache.get(catalog.data_version, "countries")
+    if payload is None:
+        payload = payload_cache.put(catalog.data_version, "countries",
+                                    [{"id": c.id, "name": c.name} for c in catalog.all()])
+    return cached_response(payload, if_none_match, accept_encoding)
 
+MAX_SUGGESTIONS = 20
 
-from pydantic import BaseModel
+@app.get("/api/countries/suggest")
+async def suggest_countries(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=MAX_SUGGESTIONS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Autocomplete for country search boxes: names (or any word in them, or aliases)
+    starting with q, e.g. /api/countries/suggest?q=sou. Misspellings fall back to
+    the closest names.
+    """
+    await catalog.ensure_loaded_async(db)
+    return ORJSONResponse([{"id": c.id, "name": c.name} for c in catalog.complete(q, limit)])
+
+@app.get("/api/bundle")
+async def get_bundle(
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Every country, detail and quiz question in one compressed document for offline
+    use. Keep its "version" and fetch /api/bundle/delta?since=<version> afterwards.
+    """
+    version = await db.run_sync(changes.current_version)
+    payload = bundle.bundle_cache.get(version, "bundle")
+    if payload is None:
+        document = await db.run_sync(bundle.build_bundle)
+        version = document["version"]
+        payload = bundle.bundle_cache.put(version, "bundle", document)
+    response = cached_response(payload, if_none_match, accept_encoding)
+    response.headers["X-Bundle-Version"] = str(version)
+    return response
+
+@app.get("/api/bundle/delta")
+async def get_bundle_delta(since: int = Query(..., ge=0), db: AsyncSession = Depends(get_async_db)):
+    """
+    Rows changed after version `since` plus the ids deleted since then, e.g.
+    /api/bundle/delta?since=12. 409 if the version is unknown to this server.
+    """
+    delta = await db.run_sync(lambda session: bundle.build_delta(session, since))
+    if delta is None:
+        raise HTTPException(status_code=409, detail=f"Unknown version {since}; download /api/bundle again")
+    return ORJSONResponse(delta, headers={"X-Bundle-Version": str(delta["version"])})
+
+
+from typing import List
+from pydantic import BaseModel, Field
 class ChatRequest(BaseModel):
     message: str
-    country: str
+    # Optional with a session: follow-ups fall back to the session's active country
+    country: Optional[str] = None
+    session_id: Optional[str] = Field(default=None, max_length=64)
+
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatRequest] = Field(..., max_length=500)
 
 from app.chat_service import ChatService
 
 # ... (Previous code remains the same)
 
 @app.post("/api/chat")
-def chat_culture(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_culture(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Intelligent cultural chat using Agentic Pattern (ChatService).
+
+    Every response carries a session_id; sending it back with the next message keeps
+    the active country (and its details) on the server between turns.
+    """
+    chat_session = session_store.load(request.session_id)
+    # ChatService is sync; run_sync drives it on the async connection without a worker thread
+    answer = await db.run_sync(
+        lambda session: ChatService(session).process_turn(request.message, request.country, chat_session)
+    )
+    session_store.save(chat_session)
+    answer["session_id"] = chat_session.id
+    return ORJSONResponse(answer)
+
+def sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + serialize(data) + b"\n\n"
+
+def chat_stream_response(message: str, country: Optional[str], session_id: Optional[str]):
+    chat_session = session_store.load(session_id)
+
+    async def events():
+        # The stream outlives the request's dependencies, so it owns its database session
+        async with database.AsyncSessionLocal() as db:
+            turn = await db.run_sync(
+                lambda session: ChatService(session).stream_turn(message, country, chat_session))
+            try:
+                while True:
+                    # Each step runs inside run_sync, so the generator can use the session
+                    step = await db.run_sync(lambda _: next(turn, None))
+                    if step is None:
+                        break
+                    yield sse_event(*step)
+            finally:
+                turn.close()
+                session_store.save(chat_session)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/chat/stream")
+async def chat_culture_stream(request: ChatRequest):
+    """
+    /api/chat as Server-Sent Events: "country" (active country + session_id) first,
+    then "message" events with the response text line by line, then "done".
+    """
+    return chat_stream_response(request.message, request.country, request.session_id)
+
+@app.get("/api/chat/stream")
+async def chat_culture_stream_get(
+    message: str = Query(..., min_length=1),
+    country: Optional[str] = None,
+    session_id: Optional[str] = Query(default=None, max_length=64),
+):
+    """
+    Same stream for EventSource clients, which can only send GET requests.
+    """
+    return chat_stream_response(message, country, session_id)
+
+@app.post("/api/chat/batch")
+async def chat_culture_batch(request: ChatBatchRequest, db: AsyncSession = Depends(get_async_db)):
     """
-    chat_agent = ChatService(db)
-    return chat_agent.process_message(request.message, request.country)
+    Answer a burst of chat messages in one call. Results come back in request order.
+    """
+    items = [(m.message, m.country) for m in request.messages]
+    return ORJSONResponse(await db.run_sync(lambda session: ChatService(session).process_batch(items)))
+
+MAX_SEARCH_RESULTS = 50
+
+@app.get("/api/search")
+async def search_details(
+    q: str = Query(..., min_length=1, max_length=200),
+    country: Optional[str] = None,
+    limit: int = Query(default=10, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    BM25-ranked full-text search over detail topics and descriptions, e.g.
+    /api/search?q=tipping in restaurants&country=Japan. Snippets mark hits with <mark>.
+    """
+    await catalog.ensure_loaded_async(db)
+    country_id = None
+    if country:
+        country_obj = catalog.resolve_fuzzy(country)
+        if not country_obj:
+            return country_not_found(country.strip())
+        country_id = country_obj.id
+
+    hits = await db.run_sync(lambda session: search.search(session, q, country_id=country_id, limit=limit))
+    return ORJSONResponse({
+        "query": q,
+        "results": [
+            {
+                "country": catalog.get(h.country_id).name if catalog.get(h.country_id) else None,
+                "category": h.category,
+                "topic": h.topic,
+                "description": h.description,
+                "is_strict": h.is_strict,
+                "snippet": h.snippet,
+                "score": round(h.score, 4),
+            }
+            for h in hits
+        ],
+    })
+
+MAX_QUIZ_PAGE = 100
+
+def quiz_response(country_ids, limit, offset, seed, include_answers):
+    questions, total = quiz_bank.page(country_ids, limit=limit, offset=offset, seed=seed)
+    if not include_answers:
+        questions = [{k: v for k, v in q.items() if k != "answer"} for q in questions]
+    return ORJSONResponse(questions, headers={"X-Total-Count": str(total)})
 
 @app.get("/api/quiz/{country}")
-def get_quiz(country: str, db: Session = Depends(get_db)):
+async def get_quiz(
+    country: str,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_QUIZ_PAGE),
+    offset: int = Query(default=0, ge=0),
+    seed: Optional[str] = None,
+    include_answers: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Quiz questions for a country. Without parameters every question is returned in
+    order; `seed` gives a reproducible shuffle and `limit`/`offset` page through it.
+    The total bank size is sent in the X-Total-Count header.
+    """
     # Normalize input same way as guide
-    search_name = country.strip()
-    aliases = {
-        "usa": "United States",
-        "us": "United States",
-        "america": "United States",
-        "uk": "United Kingdom",
-        "uae": "United Arab Emirates"
-    }
-    if search_name.lower() in aliases:
-        search_name = aliases[search_name.lower()]
-        
-    country_obj = crud.get_country_by_name(db, search_name)
+    await catalog.ensure_loaded_async(db)
+    country_obj = catalog.resolve_fuzzy(country.strip())
     if not country_obj:
         return [] # Return empty list if no country/quiz
-        
-    # Get quiz questions
-    # We need a CRUD method for this, or just query here for simplicity
-    questions = db.query(models.QuizQuestion).filter(models.QuizQuestion.country_id == country_obj.id).all()
-    
-    return [
-        {
-            "id": q.id,
-            "question": q.question,
-            "options": [q.option_a, q.option_b, q.option_c, q.option_d],
-            "answer": q.answer
-        }
-        for q in questions
-    ]
 
+    # Questions are precomputed per country when the process starts
+    await quiz_bank.ensure_loaded_async(db)
+    return quiz_response([country_obj.id], limit, offset, seed, include_answers)
+
+@app.get("/api/quiz")
+async def get_mixed_quiz(
+    countries: str,
+    limit: int = Query(default=10, ge=1, le=MAX_QUIZ_PAGE),
+    offset: int = Query(default=0, ge=0),
+    seed: Optional[str] = None,
+    include_answers: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Mixed-region quiz sampled across several countries, e.g. /api/quiz?countries=Japan,India&seed=7.
+    Unknown names are ignored.
+    """
+    await catalog.ensure_loaded_async(db)
+    await quiz_bank.ensure_loaded_async(db)
+    country_ids = []
+    for name in countries.split(","):
+        country_obj = catalog.resolve_fuzzy(name.strip())
+        if country_obj and country_obj.id not in country_ids:
+            country_ids.append(country_obj.id)
+    return quiz_response(country_ids, limit, offset, seed, include_answers)
+
+MAX_ATTEMPTS_PER_REQUEST = 100
+
+class QuizAnswer(BaseModel):
+    question_id: int
+    answer: str = Field(..., max_length=500)
+
+class QuizAttemptsRequest(BaseModel):
+    attempts: List[QuizAnswer] = Field(..., min_length=1, max_length=MAX_ATTEMPTS_PER_REQUEST)
+
+@app.post("/api/quiz/{country}/attempts", status_code=202)
+async def record_quiz_attempts(country: str, request: QuizAttemptsRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Record answers to a country's quiz. They are graded here, queued and written in
+    batches in the background; 503 with Retry-After when the queue is full.
+    """
+    await catalog.ensure_loaded_async(db)
+    country_obj = catalog.resolve_fuzzy(country.strip())
+    if not country_obj:
+        return country_not_found(country.strip())
+    await quiz_bank.ensure_loaded_async(db)
+
+    attempts, results, unknown = [], [], []
+    submitted_at = utc_now()
+    for a in request.attempts:
+        question = quiz_bank.find(country_obj.id, a.question_id)
+        if question is None:
+            unknown.append(a.question_id)
+            continue
+        correct = a.answer == question["answer"]
+        attempts.append(Attempt(question["id"], country_obj.id, a.answer, correct, submitted_at))
+        results.append({"question_id": question["id"], "correct": correct})
+
+    if attempts and not attempt_recorder.submit(attempts):
+        return ORJSONResponse(status_code=503, content={"detail": "Too many quiz attempts queued, retry later"},
+                              headers={"Retry-After": str(attempt_recorder.retry_after())})
+    return ORJSONResponse(status_code=202, content={"accepted": len(attempts), "results": results, "unknown": unknown})
+
+@app.get("/api/quiz/{country}/stats")
+async def get_quiz_stats(country: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Accuracy for a country's quiz and each of its questions (hardest first), from
+    in-memory totals. Queued attempts show up once they are written.
+    """
+    await catalog.ensure_loaded_async(db)
+    country_obj = catalog.resolve_fuzzy(country.strip())
+    if not country_obj:
+        return country_not_found(country.strip())
+    await quiz_bank.ensure_loaded_async(db)
+    stats = attempt_recorder.country_stats(country_obj.id, quiz_bank.questions(country_obj.id))
+    return ORJSONResponse(dict({"country": country_obj.name}, **stats))
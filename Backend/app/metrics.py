@@ -0,0 +1,234 @@
+"""
+Request-level instrumentation exposed in Prometheus text format at /metrics.
+
+MetricsMiddleware records per-route latency histograms, in-flight gauges and
+status code counters. SQLAlchemy engine events count the statements each
+request issues and the time spent in the database; requests slower than
+settings.slow_request_ms are logged together with the SQL they ran.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+from .config import settings
+
+logger = logging.getLogger("geopulse.slow_requests")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+MAX_LOGGED_STATEMENTS = 50
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {total:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *label_values):
+        self.inc(*label_values, amount=-1.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        # Callables returning extra exposition lines (caches, admission control, ...)
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.add(Histogram(
+    "geopulse_http_request_duration_seconds", "HTTP request latency.", ("route", "method")))
+REQUESTS = registry.add(Counter(
+    "geopulse_http_requests_total", "HTTP requests by status code.", ("route", "method", "status")))
+IN_FLIGHT = registry.add(Gauge(
+    "geopulse_http_requests_in_flight", "Requests currently being served.", ("route",)))
+DB_QUERIES = registry.add(Histogram(
+    "geopulse_db_queries_per_request", "SQL statements issued per request.", ("route",), QUERY_COUNT_BUCKETS))
+DB_TIME = registry.add(Histogram(
+    "geopulse_db_seconds_per_request", "Time spent executing SQL per request.", ("route",)))
+SLOW_REQUESTS = registry.add(Counter(
+    "geopulse_slow_requests_total", "Requests slower than the slow-request threshold.", ("route",)))
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    statements: List[Tuple[float, str]] = field(default_factory=list)
+
+
+# Stats of the request being served in the current task (SQLAlchemy propagates the
+# context into run_sync greenlets, so engine events see it too)
+_current: ContextVar[Optional[RequestStats]] = ContextVar("geopulse_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("geopulse_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("geopulse_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if settings.slow_request_log_sql and len(stats.statements) < MAX_LOGGED_STATEMENTS:
+        stats.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine):
+    """
+    Count statements and database time per request on a sync engine (use async_engine.sync_engine).
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(app, scope) -> str:
+    # Route templates keep label cardinality bounded ("/api/guide/{country}", not every country)
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware; for streamed responses latency is measured to the last byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_label(scope["app"], scope)
+        # Shared with inner middleware (admission control) so routes are matched once
+        scope["geopulse.route"] = route
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec(route)
+            _current.reset(token)
+            REQUEST_LATENCY.observe(elapsed, route, method)
+            REQUESTS.inc(route, method, str(status_code))
+            DB_QUERIES.observe(stats.queries, route)
+            DB_TIME.observe(stats.db_seconds, route)
+            if elapsed * 1000 >= settings.slow_request_ms:
+                SLOW_REQUESTS.inc(route)
+                _log_slow_request(method, scope.get("path", ""), status_code, elapsed, stats)
+
+
+def _log_slow_request(method, path, status_code, elapsed, stats: RequestStats):
+    lines = [f"Slow request {method} {path} -> {status_code} in {elapsed * 1000:.1f}ms "
+             f"({stats.queries} queries, {stats.db_seconds * 1000:.1f}ms in database)"]
+    for seconds, statement in stats.statements:
+        lines.append(f"  [{seconds * 1000:.2f}ms] {' '.join(statement.split())}")
+    logger.warning("\n".join(lines))
@@ -0,0 +1,90 @@
+"""
+Schema migrations for existing databases.
+
+create_all() only creates missing tables; it never adds columns or indexes
+to tables that already exist (e.g. a cultural.db seeded before the indexes
+were declared). upgrade() fills that gap and is safe to run repeatedly:
+
+    python -m app.migrations
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from sqlalchemy.schema import CreateColumn
+
+from . import changes, models, database, search
+
+
+def _index_names(engine, table_name):
+    # The inspector skips expression indexes such as lower(name), so ask the catalog directly
+    if engine.dialect.name == "sqlite":
+        sql = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"
+    elif engine.dialect.name == "postgresql":
+        sql = "SELECT indexname FROM pg_indexes WHERE tablename = :t"
+    else:
+        return {ix["name"] for ix in inspect(engine).get_indexes(table_name)}
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text(sql), {"t": table_name})}
+
+
+def _add_missing_columns(engine):
+    """
+    ALTER TABLE ... ADD COLUMN for mapped columns an existing table lacks. New
+    columns must be nullable or have a server default. Returns "table.column" names.
+    """
+    added = []
+    inspector = inspect(engine)
+    for table in models.Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def upgrade(engine=None):
+    """
+    Bring the schema up to date with models.py. Returns the names of columns and indexes created.
+    """
+    engine = engine or database.engine
+    models.Base.metadata.create_all(bind=engine)
+
+    created = _add_missing_columns(engine)
+    for table in models.Base.metadata.sorted_tables:
+        existing = _index_names(engine, table.name)
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=engine)
+            except IntegrityError as e:
+                raise RuntimeError(
+                    f"Cannot create unique index {index.name}: {table.name} has duplicate rows. "
+                    "Remove the duplicates and re-run the migration."
+                ) from e
+            created.append(index.name)
+
+    # Full-text index over cultural details (SQLite FTS5), kept in sync by triggers
+    if search.install(engine):
+        created.append(search.FTS_TABLE)
+    # Row versions for delta sync: the counter row and (SQLite) the versioning triggers
+    if changes.install(engine):
+        created.append("sync_state")
+
+    if created and engine.dialect.name == "sqlite":
+        # Refresh planner statistics so the new indexes are picked up
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    return created
+
+
+if __name__ == "__main__":
+    created = upgrade()
+    if created:
+        print("Created: " + ", ".join(created))
+    else:
+        print("Schema is up to date.")
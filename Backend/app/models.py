@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Boolean, DateTime, Index, func
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -8,13 +8,20 @@ class Country(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False)
     language = Column(String, nullable=True)
+    # Change tracking for /api/bundle/delta (see changes.py)
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+
+    # Case-insensitive lookups (crud.get_country_by_name) use lower(name)
+    __table_args__ = (
+        Index("ix_countries_name_lower", func.lower(name)),
+    )
 
     # Existing relationships
     cultural_data = relationship("CulturalData", back_populates="country")
     quiz_questions = relationship("QuizQuestion", back_populates="country")
     
     # NEW relationship for detailed data
-    details = relationship("CulturalDetail", back_populates="country") 
+    details = relationship("CulturalDetail", back_populates="country", order_by="CulturalDetail.id")
 
 class CulturalData(Base):
     # NOTE: This table is being kept but will be phased out for detail
@@ -26,6 +33,10 @@ class CulturalData(Base):
 
     country = relationship("Country", back_populates="cultural_data")
 
+    __table_args__ = (
+        Index("ix_cultural_data_country_id", "country_id"),
+    )
+
 class QuizQuestion(Base):
     __tablename__ = "quiz_questions"
     id = Column(Integer, primary_key=True, index=True)
@@ -36,9 +47,15 @@ class QuizQuestion(Base):
     option_c = Column(String, nullable=False)
     option_d = Column(String, nullable=False)
     answer = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
 
     country = relationship("Country", back_populates="quiz_questions")
 
+    # Serves per-country quiz loads and the seeder's (country, question) dedupe
+    __table_args__ = (
+        Index("uq_quiz_questions_country_question", "country_id", "question", unique=True),
+    )
+
 class CulturalDetail(Base):
     """
     Detailed, structured cultural and etiquette rules.
@@ -59,6 +76,47 @@ class CulturalDetail(Base):
     
     # Severity of the rule (helpful for filtering/emphasis)
     is_strict = Column(Boolean, default=False) 
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
     
     # Relationship back to Country
-    country = relationship("Country", back_populates="details")
\ No newline at end of file
+    country = relationship("Country", back_populates="details")
+
+    # Serves per-country detail loads and the seeder's (country, category, topic) dedupe
+    __table_args__ = (
+        Index("uq_cultural_details_country_category_topic", "country_id", "category", "topic", unique=True),
+    )
+
+class SyncState(Base):
+    """
+    Single-row counter behind the row versions (see changes.py).
+    """
+    __tablename__ = "sync_state"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class Tombstone(Base):
+    """
+    A deleted row, so delta sync can tell clients to drop it.
+    """
+    __tablename__ = "tombstones"
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, index=True)
+
+class QuizAttempt(Base):
+    """
+    One answer to a quiz question, graded on the server (written in batches, see attempts.py).
+    """
+    __tablename__ = "quiz_attempts"
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("quiz_questions.id"), nullable=False)
+    country_id = Column(Integer, ForeignKey("countries.id"), nullable=False)
+    answer = Column(String, nullable=False)
+    is_correct = Column(Boolean, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Serves the per-question totals loaded at start-up
+    __table_args__ = (
+        Index("ix_quiz_attempts_question_id", "question_id"),
+    )
@@ -0,0 +1,70 @@
+"""
+Query-plan check for the per-country hot queries.
+
+Fails (exit code 1) if any of them would scan a table instead of using the
+index it was written for:
+
+    python -m app.query_plans
+"""
+import sys
+
+from sqlalchemy import func, select, text
+
+from . import database
+from .models import Country, CulturalDetail, QuizQuestion
+
+# (name, statement, index the planner is expected to use)
+HOT_QUERIES = [
+    ("guide details",
+     select(CulturalDetail).where(CulturalDetail.country_id == 1),
+     "uq_cultural_details_country_category_topic"),
+    ("batch chat details",
+     select(CulturalDetail).where(CulturalDetail.country_id.in_([1, 2, 3])),
+     "uq_cultural_details_country_category_topic"),
+    ("seed detail lookup",
+     select(CulturalDetail).where(CulturalDetail.country_id == 1, CulturalDetail.category == "GREETING",
+                                  CulturalDetail.topic == "Handshake"),
+     "uq_cultural_details_country_category_topic"),
+    ("quiz questions",
+     select(QuizQuestion).where(QuizQuestion.country_id == 1),
+     "uq_quiz_questions_country_question"),
+    ("seed quiz lookup",
+     select(QuizQuestion).where(QuizQuestion.country_id == 1, QuizQuestion.question == "?"),
+     "uq_quiz_questions_country_question"),
+    ("country by name (case-insensitive)",
+     select(Country).where(func.lower(Country.name) == "japan"),
+     "ix_countries_name_lower"),
+]
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return "\n".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+    return "\n".join(row[0] for row in conn.execute(text("EXPLAIN " + sql)))
+
+
+def check(engine=None):
+    """
+    Returns a list of (name, plan) for every hot query that does not use its index.
+    """
+    engine = engine or database.engine
+    failures = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Tiny tables would otherwise legitimately prefer a sequential scan
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, statement, index in HOT_QUERIES:
+            plan = explain(conn, statement)
+            if index not in plan:
+                failures.append((name, plan))
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check()
+    for name, plan in failures:
+        print(f"FAIL {name}: expected index not used\n  {plan}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: all {len(HOT_QUERIES)} hot queries use their indexes.")
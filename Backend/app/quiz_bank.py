@@ -0,0 +1,118 @@
+import random
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .catalog import catalog
+from .snapshot import snapshot_store
+
+
+def _question_dict(q) -> dict:
+    return {
+        "id": q.id,
+        "question": q.question,
+        "options": [q.option_a, q.option_b, q.option_c, q.option_d],
+        "answer": q.answer,
+    }
+
+
+class QuizBank:
+    """
+    Per-country quiz questions. With a snapshot they are read from the shared
+    mapping (decoded per question served); otherwise they are built once from the
+    database and served from memory as ready-to-send dicts. Either way they
+    follow the catalog: when its data version moves on, so does the bank.
+    """
+
+    def __init__(self):
+        self._by_country: Dict[int, Tuple[dict, ...]] = {}
+        # question id -> its dict, per country (the snapshot has its own lookup)
+        self._by_id: Dict[int, Dict[int, dict]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.data_version = None
+
+    def load(self, db: Session):
+        data_version = crud.get_data_version(db)
+        by_country: Dict[int, List[dict]] = {}
+        for q in crud.get_all_quiz_questions(db):
+            by_country.setdefault(q.country_id, []).append(_question_dict(q))
+        frozen = {country_id: tuple(questions) for country_id, questions in by_country.items()}
+        by_id = {country_id: {q["id"]: q for q in questions} for country_id, questions in frozen.items()}
+        with self._lock:
+            self._by_country = frozen
+            self._by_id = by_id
+            self.data_version = data_version
+            self.loaded = True
+
+    def snapshot(self):
+        # The shared snapshot, if it holds the same data as the catalog
+        snapshot = snapshot_store.current()
+        if snapshot is not None and snapshot.data_version == catalog.data_version:
+            return snapshot
+        return None
+
+    def is_stale(self) -> bool:
+        return self.snapshot() is None and (not self.loaded or self.data_version != catalog.data_version)
+
+    def ensure_loaded(self, db: Session):
+        catalog.ensure_loaded(db)
+        if self.is_stale():
+            self.load(db)
+
+    async def ensure_loaded_async(self, db):
+        # Callers bring the catalog up to date first (catalog.ensure_loaded_async)
+        if self.is_stale():
+            await db.run_sync(self.load)
+
+    def questions(self, country_id: int) -> Sequence[dict]:
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.questions(country_id)
+        return self._by_country.get(country_id, ())
+
+    def find(self, country_id: int, question_id: int) -> Optional[dict]:
+        # Grading every submitted attempt goes through here, so no scan of the bank
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.find_question(country_id, question_id)
+        return self._by_id.get(country_id, {}).get(question_id)
+
+    def page(self, country_ids: Sequence[int], limit: Optional[int] = None, offset: int = 0,
+             seed=None) -> Tuple[List[dict], int]:
+        """
+        A page of questions drawn from one or more countries' banks, plus the total count.
+
+        Without a seed the banks are concatenated in order. With a seed the combined
+        bank is shuffled reproducibly: the same seed always yields the same order, so
+        clients can page through it with offset/limit.
+        """
+        banks = [self.questions(country_id) for country_id in country_ids]
+        # Index the banks as one virtual sequence without concatenating them
+        starts, total = [], 0
+        for bank in banks:
+            starts.append(total)
+            total += len(bank)
+
+        end = total if limit is None else min(total, offset + limit)
+        if offset >= end:
+            return [], total
+
+        if seed is not None:
+            # A real shuffle of the combined bank. str() so ?seed=7 and seed=7 agree, and
+            # string seeds hash the same in every worker process.
+            positions = random.Random(str(seed)).sample(range(total), total)[offset:end]
+        else:
+            positions = range(offset, end)
+
+        items = []
+        for pos in positions:
+            bank = bisect_right(starts, pos) - 1
+            items.append(banks[bank][pos - starts[bank]])
+        return items, total
+
+
+quiz_bank = QuizBank()
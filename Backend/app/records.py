@@ -0,0 +1,22 @@
+"""
+Plain, read-only copies of database rows, shared by the storage layers
+(snapshot) and the services that read them.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class DetailRecord:
+    """
+    Plain copy of a CulturalDetail row (no ORM session attached).
+    """
+    id: int
+    country_id: int
+    category: str
+    topic: str
+    description: str
+    is_strict: bool
+
+    @classmethod
+    def from_row(cls, d):
+        return cls(d.id, d.country_id, d.category, d.topic, d.description, bool(d.is_strict))
@@ -0,0 +1,232 @@
+"""
+Full-text search over cultural details.
+
+On SQLite an external-content FTS5 index (cultural_details_fts) covers
+topic, description and country_id, and triggers keep it in sync with the
+cultural_details table. Results are ranked with BM25 (topic hits weigh
+double) and come with highlighted snippets. Other databases fall back to a
+plain substring scan so the API keeps working.
+"""
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+FTS_TABLE = "cultural_details_fts"
+
+# Words that carry no meaning for retrieval, including generic "give me info" requests
+STOPWORDS = frozenset("""
+a about an and any are as at be can could do does for from give have how i if in is it know me my
+of on or please should tell the there their them they this to what when where which who why will with
+would you your advice guide help summary etiquette customs culture cultural info information
+us we our ours he him his she her hers its mine yours theirs myself
+s t d ll m re ve
+""".split())
+
+TERM_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+_INSERT_TRIGGER_SQL = f"""CREATE TRIGGER IF NOT EXISTS cultural_details_fts_ai AFTER INSERT ON cultural_details BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, topic, description, country_id)
+        VALUES (new.id, new.topic, new.description, new.country_id);
+    END"""
+
+_INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        topic, description, country_id,
+        content='cultural_details', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    _INSERT_TRIGGER_SQL,
+    f"""CREATE TRIGGER IF NOT EXISTS cultural_details_fts_ad AFTER DELETE ON cultural_details BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, topic, description, country_id)
+        VALUES ('delete', old.id, old.topic, old.description, old.country_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS cultural_details_fts_au AFTER UPDATE ON cultural_details BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, topic, description, country_id)
+        VALUES ('delete', old.id, old.topic, old.description, old.country_id);
+        INSERT INTO {FTS_TABLE}(rowid, topic, description, country_id)
+        VALUES (new.id, new.topic, new.description, new.country_id);
+    END""",
+]
+
+# Columns: 0 topic, 1 description, 2 country_id (weight 0, not matched on).
+# Rank inside the index first; snippets and the join only run for the top hits.
+_SEARCH_SQL = f"""
+    WITH top AS (
+        SELECT rowid AS id, bm25({FTS_TABLE}, 2.0, 1.0, 0.0) AS score
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH :match
+        ORDER BY score
+        LIMIT :limit
+    )
+    SELECT d.id, d.country_id, d.category, d.topic, d.description, d.is_strict, top.score,
+           snippet({FTS_TABLE}, 1, '<mark>', '</mark>', '…', 16) AS snippet
+    FROM top
+    JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = top.id
+    JOIN cultural_details AS d ON d.id = top.id
+    WHERE {FTS_TABLE} MATCH :match
+    ORDER BY top.score
+"""
+
+# Within one country: its details' id range comes from the country_id index, so FTS5
+# only walks that slice of each term's doclist; the join drops other countries' rows
+# that fall inside the range.
+_COUNTRY_RANGE_SQL = "SELECT min(id), max(id) FROM cultural_details WHERE country_id = :country_id"
+
+_SCOPED_SEARCH_SQL = f"""
+    WITH top AS (
+        SELECT {FTS_TABLE}.rowid AS id, bm25({FTS_TABLE}, 2.0, 1.0, 0.0) AS score
+        FROM {FTS_TABLE}
+        JOIN cultural_details AS d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :match AND {FTS_TABLE}.rowid BETWEEN :first_id AND :last_id
+          AND d.country_id = :country_id
+        ORDER BY score
+        LIMIT :limit
+    )
+    SELECT d.id, d.country_id, d.category, d.topic, d.description, d.is_strict, top.score,
+           snippet({FTS_TABLE}, 1, '<mark>', '</mark>', '…', 16) AS snippet
+    FROM top
+    JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = top.id
+    JOIN cultural_details AS d ON d.id = top.id
+    WHERE {FTS_TABLE} MATCH :match AND {FTS_TABLE}.rowid BETWEEN :first_id AND :last_id
+    ORDER BY top.score
+"""
+
+
+@dataclass
+class SearchHit:
+    id: int
+    country_id: int
+    category: str
+    topic: str
+    description: str
+    is_strict: bool
+    score: float
+    snippet: str
+
+
+def _installed(conn) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :t"), {"t": FTS_TABLE}
+    ).first() is not None
+
+
+def install(engine) -> bool:
+    """
+    Create the FTS index and its sync triggers (SQLite only). Returns True if the
+    index was newly created and back-filled.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        exists = _installed(conn)
+        for statement in _INSTALL_SQL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    return not exists
+
+
+@contextmanager
+def deferred_indexing(conn):
+    """
+    For bulk loads: drop the per-row insert trigger and index all new details with
+    one INSERT ... SELECT at the end (several times faster). Must run inside the
+    load's transaction so a failed load rolls the trigger change back too.
+    """
+    if conn.dialect.name != "sqlite" or not _installed(conn):
+        yield
+        return
+    last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM cultural_details")).scalar()
+    conn.execute(text("DROP TRIGGER IF EXISTS cultural_details_fts_ai"))
+    yield
+    conn.execute(text(f"""
+        INSERT INTO {FTS_TABLE}(rowid, topic, description, country_id)
+        SELECT id, topic, description, country_id FROM cultural_details WHERE id > :last_id
+    """), {"last_id": last_id})
+    conn.execute(text(_INSERT_TRIGGER_SQL))
+
+
+def search_terms(query: str, ignore=()) -> List[str]:
+    """
+    Meaningful, de-duplicated lowercase terms of a free-form query.
+    """
+    ignored = STOPWORDS.union(ignore)
+    terms = []
+    for term in TERM_RE.findall(query.casefold()):
+        if term not in ignored and term not in terms and not term.isdigit():
+            terms.append(term)
+    return terms
+
+
+def _stems(word: str) -> set:
+    # Just enough stemming to line up plurals and -ing/-ed forms ("tipping" -> "tip")
+    stems = {word}
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stem = word[:-len(suffix)]
+            stems.add(stem)
+            if len(stem) > 3 and stem[-1] == stem[-2]:
+                stems.add(stem[:-1])
+    return stems
+
+
+def shares_word(terms: List[str], text: str) -> bool:
+    """
+    True if one of terms is also a word of text, give or take a plural or
+    -ing/-ed ending: "bowing" matches "Bow", but "bowls" does not.
+    """
+    words = set()
+    for word in search_terms(text):
+        words |= _stems(word)
+    return any(_stems(term) & words for term in terms)
+
+
+def _match_expression(terms: List[str]) -> str:
+    # Quote every term so user input can never inject FTS5 syntax
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def search(db: Session, query: str, country_id: Optional[int] = None, limit: int = 10,
+           ignore=()) -> List[SearchHit]:
+    """
+    BM25-ranked details matching any query term, optionally within one country.
+    """
+    terms = search_terms(query, ignore)
+    if not terms:
+        return []
+    if db.get_bind().dialect.name != "sqlite":
+        return _fallback_search(db, terms, country_id, limit)
+
+    params = {"match": _match_expression(terms), "limit": limit}
+    if country_id is None:
+        rows = db.execute(text(_SEARCH_SQL), params)
+    else:
+        first_id, last_id = db.execute(text(_COUNTRY_RANGE_SQL), {"country_id": country_id}).one()
+        if first_id is None:
+            return []
+        rows = db.execute(text(_SCOPED_SEARCH_SQL),
+                          dict(params, country_id=country_id, first_id=first_id, last_id=last_id))
+    return [SearchHit(r.id, r.country_id, r.category, r.topic, r.description, bool(r.is_strict),
+                      r.score, r.snippet) for r in rows]
+
+
+def _fallback_search(db: Session, terms: List[str], country_id: Optional[int], limit: int) -> List[SearchHit]:
+    from .models import CulturalDetail
+    from sqlalchemy import or_
+
+    conditions = [CulturalDetail.description.ilike(f"%{t}%") for t in terms]
+    conditions += [CulturalDetail.topic.ilike(f"%{t}%") for t in terms]
+    q = db.query(CulturalDetail).filter(or_(*conditions))
+    if country_id is not None:
+        q = q.filter(CulturalDetail.country_id == country_id)
+    hits = []
+    for d in q.limit(limit * 5).all():
+        haystack = f"{d.topic} {d.topic} {d.description}".casefold()
+        score = -float(sum(haystack.count(t) for t in terms))
+        hits.append(SearchHit(d.id, d.country_id, d.category, d.topic, d.description, bool(d.is_strict),
+                              score, d.description))
+    hits.sort(key=lambda h: h.score)
+    return hits[:limit]
@@ -0,0 +1,159 @@
+"""
+Bulk, idempotent loader for countries, cultural details and quiz questions.
+
+Records look like the inline seed data:
+
+    {"name": "Japan", "language": "Japanese",
+     "details": [{"category": ..., "topic": ..., "description": ..., "is_strict": ...}],
+     "quiz": [{"question": ..., "option_a": ..., ..., "answer": ...}]}
+
+Everything is written in one transaction with batched executemany
+INSERT ... ON CONFLICT DO NOTHING statements, so re-running a load only
+adds rows that are missing (same semantics as the old per-row SELECT checks).
+Every inserted row is stamped with one new sync version (see changes.py).
+"""
+import json
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .changes import claim_version, release_if_unused
+from .models import Country, CulturalDetail, QuizQuestion
+from .search import deferred_indexing
+
+DEFAULT_BATCH_SIZE = 500  # countries per batch
+
+
+@dataclass
+class LoadStats:
+    countries: int = 0
+    details: int = 0
+    questions: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.countries + self.details + self.questions
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.countries} countries, {self.details} details, {self.questions} quiz questions "
+                f"inserted in {self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/sec)")
+
+
+def _insert(dialect_name: str, table):
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    raise ValueError(f"Bulk seeding is not supported on '{dialect_name}'")
+
+
+def iter_records_from_file(path: str) -> Iterator[dict]:
+    """
+    Records from an NDJSON file (one record per line, streamed) or a JSON file
+    holding either a list of records or a {name: {language, details, quiz}} dict
+    (read into memory whole, since it is a single document).
+    """
+    if path.endswith((".ndjson", ".jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        for name, record in data.items():
+            yield {"name": name, **record}
+    else:
+        yield from data
+
+
+def iter_records_from_dict(world_data: Dict[str, dict]) -> Iterator[dict]:
+    for name, record in world_data.items():
+        yield {"name": name, **record}
+
+
+def _batches(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    it = iter(records)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _rowcount(result) -> int:
+    # Some drivers report -1 for executemany
+    return max(result.rowcount, 0)
+
+
+def bulk_load(engine, records: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> LoadStats:
+    """
+    Insert all records in a single transaction. Returns per-table insert counts and timing.
+    """
+    stats = LoadStats()
+    started = time.perf_counter()
+    dialect_name = engine.dialect.name
+
+    country_insert = _insert(dialect_name, Country.__table__).on_conflict_do_nothing(
+        index_elements=["name"])
+    detail_insert = _insert(dialect_name, CulturalDetail.__table__).on_conflict_do_nothing(
+        index_elements=["country_id", "category", "topic"])
+    quiz_insert = _insert(dialect_name, QuizQuestion.__table__).on_conflict_do_nothing(
+        index_elements=["country_id", "question"])
+
+    with engine.begin() as conn, deferred_indexing(conn):
+        version = claim_version(conn)
+        for batch in _batches(records, batch_size):
+            # 1. Countries, then map every name in the batch to its id in one query
+            names = list(dict.fromkeys(r["name"] for r in batch))
+            stats.countries += _rowcount(conn.execute(country_insert, [
+                {"name": r["name"], "language": r.get("language") or "Local", "version": version} for r in batch
+            ]))
+            ids = dict(conn.execute(select(Country.name, Country.id).where(Country.name.in_(names))).all())
+
+            # 2. Details and quiz questions for the whole batch
+            details = [
+                {
+                    "country_id": ids[r["name"]],
+                    "category": d["category"],
+                    "topic": d["topic"],
+                    "description": d["description"],
+                    "is_strict": bool(d.get("is_strict", False)),
+                    "version": version,
+                }
+                for r in batch for d in r.get("details", ())
+            ]
+            if details:
+                stats.details += _rowcount(conn.execute(detail_insert, details))
+
+            questions = [
+                {
+                    "country_id": ids[r["name"]],
+                    "question": q["question"],
+                    "option_a": q["option_a"],
+                    "option_b": q["option_b"],
+                    "option_c": q["option_c"],
+                    "option_d": q["option_d"],
+                    "answer": q["answer"],
+                    "version": version,
+                }
+                for r in batch for q in r.get("quiz", ())
+            ]
+            if questions:
+                stats.questions += _rowcount(conn.execute(quiz_insert, questions))
+        # Nothing new: don't bump the version clients sync against
+        release_if_unused(conn, version)
+
+    stats.seconds = time.perf_counter() - started
+    return stats
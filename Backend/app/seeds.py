@@ -1,26 +1,13 @@
-from sqlalchemy.orm import Session
-from database import engine
-from models import Country, CulturalDetail, QuizQuestion, Base
-from sqlalchemy.exc import IntegrityError
-from contextlib import contextmanager
+import argparse
 
-# Ensure tables exist
-Base.metadata.create_all(bind=engine)
+from app.database import engine
+from app.migrations import upgrade
+from app.seed_loader import DEFAULT_BATCH_SIZE, bulk_load, iter_records_from_file
 
-@contextmanager
-def get_session():
-    session = Session(bind=engine)
-    try:
-        yield session
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        print(f"Session error: {e}")
-    finally:
-        session.close()
 
-def seed_data():
+def seed_data(batch_size=DEFAULT_BATCH_SIZE):
     print("Starting Global Cultural Intelligence database seed...")
+    upgrade(engine)
     
     # --- Part 1: CULTURAL DETAILS ---
     # Enhanced structure with 'COMMON MISTAKES' and 'SITUATIONAL TIPS'
@@ -264,123 +251,79 @@ def seed_data():
         ]
     }
 
-    with get_session() as session:
-        # 1. Process explicit detailed countries (world_data)
-        for name, data in world_data.items():
-            process_country(session, name, data)
-            
-            # CHECK: If this country has no specific quiz, give it a Regional Quiz
-            if name not in quiz_data:
-                # Determine region based on simple keywords/lists or default to Asia/Middle East for Afghanistan
-                # Simple region mapper for world_data keys
-                region_quiz = regional_quizzes["Europe"] 
-                
-                if name in ["Afghanistan", "China", "India", "Japan", "Thailand", "Vietnam"]:
-                     region_quiz = regional_quizzes["Asia"]
-                elif name in ["Brazil", "Argentina"]:
-                     region_quiz = regional_quizzes["LatinAmerica"]
-                elif name in ["Egypt", "Nigeria", "South Africa"]:
-                     region_quiz = regional_quizzes["Africa"]
-                
-                # Check mapping from heuristic logic below to be safe? 
-                # Actually, simple region mapping is better.
-                if name == "Afghanistan": region_quiz = regional_quizzes["Asia"]
-                if name == "Brazil": region_quiz = regional_quizzes["LatinAmerica"]
-                
-                process_quiz(session, name, region_quiz)
+    # 1. Explicit detailed countries (world_data)
+    records = {}
+    for name, data in world_data.items():
+        # CHECK: If this country has no specific quiz, give it a Regional Quiz
+        region_quiz = regional_quizzes["Europe"] 
+        
+        if name in ["Afghanistan", "China", "India", "Japan", "Thailand", "Vietnam"]:
+             region_quiz = regional_quizzes["Asia"]
+        elif name in ["Brazil", "Argentina"]:
+             region_quiz = regional_quizzes["LatinAmerica"]
+        elif name in ["Egypt", "Nigeria", "South Africa"]:
+             region_quiz = regional_quizzes["Africa"]
+
+        records[name] = {"name": name, **data, "quiz": region_quiz}
 
-        # 2. Process list countries with heuristic defaults AND QUIZZES
-        # Ensure Albania is in the list
-        if "Albania" not in other_countries:
-            other_countries.append("Albania")
+    # 2. List countries with heuristic defaults AND QUIZZES
+    # Ensure Albania is in the list
+    if "Albania" not in other_countries:
+        other_countries.append("Albania")
 
-        for name in other_countries:
-            if name in world_data: continue 
-            
-            # Simple heuristic assignments matches
-            region_quiz = regional_quizzes["Europe"] # Default
-            
-            if name in ["Argentina", "Bolivia", "Chile", "Colombia", "Costa Rica", "Cuba", "Dominican Republic", "Ecuador", "El Salvador", "Guatemala", "Honduras", "Mexico", "Nicaragua", "Panama", "Paraguay", "Peru", "Uruguay", "Venezuela"]:
-                vals = latin_america
-                region_quiz = regional_quizzes["LatinAmerica"]
-            elif name in ["Benin", "Botswana", "Burkina Faso", "Burundi", "Cameroon", "Chad", "Congo", "Egypt", "Ethiopia", "Gabon", "Ghana", "Kenya", "Liberia", "Libya", "Nigeria", "Rwanda", "Senegal", "South Africa", "Tanzania", "Uganda", "Zambia", "Zimbabwe"]:
-                vals = africa
-                region_quiz = regional_quizzes["Africa"]
-            elif name in ["Australia", "New Zealand", "Fiji", "Tonga", "Samoa"]:
-                vals = europe # Western style roughly
-                region_quiz = regional_quizzes["Europe"]
-            elif name in ["Thailand", "Vietnam", "Laos", "Cambodia", "Myanmar", "Malaysia", "Indonesia", "Philippines", "Afghanistan", "Pakistan", "Bangladesh", "Sri Lanka", "Nepal"]:
-                vals = asia
-                region_quiz = regional_quizzes["Asia"]
-            else:
-                vals = europe 
-                region_quiz = regional_quizzes["Europe"]
-                
-            process_country(session, name, vals)
-            
-            # Add regional quiz if no specific quiz exists
-            if name not in quiz_data:
-                process_quiz(session, name, region_quiz)
+    for name in other_countries:
+        if name in records: continue 
+        
+        # Simple heuristic assignments matches
+        if name in ["Argentina", "Bolivia", "Chile", "Colombia", "Costa Rica", "Cuba", "Dominican Republic", "Ecuador", "El Salvador", "Guatemala", "Honduras", "Mexico", "Nicaragua", "Panama", "Paraguay", "Peru", "Uruguay", "Venezuela"]:
+            vals = latin_america
+            region_quiz = regional_quizzes["LatinAmerica"]
+        elif name in ["Benin", "Botswana", "Burkina Faso", "Burundi", "Cameroon", "Chad", "Congo", "Egypt", "Ethiopia", "Gabon", "Ghana", "Kenya", "Liberia", "Libya", "Nigeria", "Rwanda", "Senegal", "South Africa", "Tanzania", "Uganda", "Zambia", "Zimbabwe"]:
+            vals = africa
+            region_quiz = regional_quizzes["Africa"]
+        elif name in ["Australia", "New Zealand", "Fiji", "Tonga", "Samoa"]:
+            vals = europe # Western style roughly
+            region_quiz = regional_quizzes["Europe"]
+        elif name in ["Thailand", "Vietnam", "Laos", "Cambodia", "Myanmar", "Malaysia", "Indonesia", "Philippines", "Afghanistan", "Pakistan", "Bangladesh", "Sri Lanka", "Nepal"]:
+            vals = asia
+            region_quiz = regional_quizzes["Asia"]
+        else:
+            vals = europe 
+            region_quiz = regional_quizzes["Europe"]
 
-            
-        # 3. Process Specific Quiz Data (Overrides)
-        for country_name, questions in quiz_data.items():
-            process_quiz(session, country_name, questions)
+        records[name] = {"name": name, **vals, "quiz": region_quiz}
 
-            
+    # 3. Specific Quiz Data (Overrides the regional quiz)
+    for country_name, questions in quiz_data.items():
+        if country_name not in records:
+            print(f"Skipping quiz for {country_name} - not found")
+            continue
+        records[country_name]["quiz"] = questions
+
+    stats = bulk_load(engine, records.values(), batch_size=batch_size)
+    print(stats)
     print("Database Global Cultural Intelligence seed complete!")
 
-def process_country(session, name, data):
-    # Upsert Country
-    country = session.query(Country).filter_by(name=name).first()
-    if not country:
-        country = Country(name=name, language=data.get('language', 'Local'))
-        session.add(country)
-        session.commit()
-    
-    # Upsert Details
-    for detail in data['details']:
-        exists = session.query(CulturalDetail).filter_by(
-            country_id=country.id, 
-            category=detail['category'], 
-            topic=detail['topic']
-        ).first()
-        
-        if not exists:
-            new_detail = CulturalDetail(
-                country_id=country.id,
-                category=detail['category'],
-                topic=detail['topic'],
-                description=detail['description'],
-                is_strict=detail['is_strict']
-            )
-            session.add(new_detail)
-    session.commit()
 
-def process_quiz(session, country_name, questions):
-    country = session.query(Country).filter_by(name=country_name).first()
-    if not country:
-        print(f"Skipping quiz for {country_name} - not found")
-        return
+def seed_files(paths, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Seed from NDJSON/JSON files instead of the inline data. NDJSON records are streamed
+    line by line; a .json file is parsed whole first, so use NDJSON for large datasets.
+    """
+    upgrade(engine)
+    for path in paths:
+        print(f"Loading {path}...")
+        print(bulk_load(engine, iter_records_from_file(path), batch_size=batch_size))
 
-    for q in questions:
-        exists = session.query(QuizQuestion).filter_by(
-            country_id=country.id,
-            question=q['question']
-        ).first()
-        
-        if not exists:
-            new_q = QuizQuestion(
-                country_id=country.id,
-                question=q['question'],
-                option_a=q['option_a'],
-                option_b=q['option_b'],
-                option_c=q['option_c'],
-                option_d=q['option_d'],
-                answer=q['answer']
-            )
-            session.add(new_q)
-    session.commit()
 
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the GeoPulse database.")
+    parser.add_argument("files", nargs="*", help="NDJSON (.ndjson/.jsonl) or JSON files; defaults to the built-in data")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="countries per executemany batch")
+    args = parser.parse_args()
+
+    if args.files:
+        seed_files(args.files, args.batch_size)
+    else:
+        seed_data(args.batch_size)
+
@@ -0,0 +1,156 @@
+"""
+Server-side chat sessions.
+
+A session remembers only the active country's id and the last few intents,
+so follow-up turns ("and what about tipping?") need no country in the
+request. The country's details are looked up again on each turn (from the
+shared snapshot when there is one), so a session costs a few dozen bytes
+whatever the country, and never holds details older than the data.
+
+Sessions live behind a small backend interface (get/set/delete of plain,
+JSON-compatible dicts). MemorySessionBackend is a bounded LRU with idle
+expiry; a shared store such as Redis only needs the same three methods.
+"""
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from .config import settings
+
+
+@dataclass
+class ChatSession:
+    id: str
+    country_id: Optional[int] = None
+    intents: List[str] = field(default_factory=list)
+
+    def remember(self, country, intent: str):
+        """
+        Record a finished turn; a turn without a country keeps the active one.
+        """
+        if country is not None:
+            self.country_id = country.id
+        self.intents = (self.intents + [intent])[-settings.chat_session_history:]
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "country_id": self.country_id, "intents": list(self.intents)}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["id"], data.get("country_id"), list(data.get("intents", ())))
+
+
+class SessionBackend(ABC):
+    """
+    Storage interface for session state (JSON-compatible dicts).
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def set(self, session_id: str, state: dict):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    In-process LRU: at most max_sessions entries, each dropped after idle_ttl
+    seconds without a turn. Both bounds keep memory flat under many users.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = settings.chat_session_max if max_sessions is None else max_sessions
+        self.idle_ttl = settings.chat_session_idle_ttl if idle_ttl is None else idle_ttl
+        self._clock = clock
+        # session id -> (last used, state), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        # The least recently used session is at the front, so stop at the first live one
+        while self._entries:
+            session_id, (last_used, _) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            del self._entries[session_id]
+            self.expired += 1
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._entries.get(session_id)
+            return entry[1] if entry else None
+
+    def set(self, session_id: str, state: dict):
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            self._entries[session_id] = (now, state)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SessionStore:
+    def __init__(self, backend: Optional[SessionBackend] = None):
+        self.backend = backend or MemorySessionBackend()
+        self.created = 0
+
+    def load(self, session_id: Optional[str]) -> ChatSession:
+        """
+        The session for session_id, or a fresh one if it is missing, unknown or expired.
+        """
+        state = self.backend.get(session_id) if session_id else None
+        if state is not None:
+            return ChatSession.from_dict(state)
+        self.created += 1
+        return ChatSession(secrets.token_urlsafe(16))
+
+    def save(self, session: ChatSession):
+        self.backend.set(session.id, session.to_dict())
+
+    def collect(self) -> List[str]:
+        """
+        Prometheus exposition lines (see metrics.Registry.register_collector).
+        """
+        lines = [
+            "# HELP geopulse_chat_sessions_created_total Chat sessions started.",
+            "# TYPE geopulse_chat_sessions_created_total counter",
+            f"geopulse_chat_sessions_created_total {self.created}",
+        ]
+        if isinstance(self.backend, MemorySessionBackend):
+            lines += [
+                "# HELP geopulse_chat_sessions_dropped_total Chat sessions dropped, by reason.",
+                "# TYPE geopulse_chat_sessions_dropped_total counter",
+                f'geopulse_chat_sessions_dropped_total{{reason="evicted"}} {self.backend.evicted}',
+                f'geopulse_chat_sessions_dropped_total{{reason="expired"}} {self.backend.expired}',
+                "# HELP geopulse_chat_sessions Chat sessions currently held in memory.",
+                "# TYPE geopulse_chat_sessions gauge",
+                f"geopulse_chat_sessions {len(self.backend)}",
+            ]
+        return lines
+
+
+# Shared instance used by the chat endpoint
+session_store = SessionStore()
@@ -0,0 +1,431 @@
+"""
+Compiled read-only snapshot of the seeded data, shared by all worker processes.
+
+The countries, cultural details and quiz questions are compiled into one
+file: typed column arrays plus a table of interned strings (every distinct
+category, topic, option, ... is stored once). Each country's guide is also
+stored as finished JSON, with its ETag and compressed variants. Workers
+mmap the file and read columns and strings through memoryviews. Nothing is
+copied onto the Python heap until a value is actually used, so the pages
+are shared through the OS page cache and per-worker RSS stays flat however
+many workers run.
+
+    python -m app.snapshot build
+
+writes the file next to the old one and renames it into place. Running
+workers notice the new file (checked at most every
+settings.snapshot_check_interval seconds) and switch to it between requests.
+Requests that already hold the old snapshot finish on it.
+"""
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .compression import supported_encodings, compress
+from .config import settings
+from .guide_cache import build_guide, make_etag, serialize
+from .records import DetailRecord
+
+logger = logging.getLogger("geopulse.snapshot")
+
+MAGIC = b"GPSNAP\x00\x00"
+FORMAT_VERSION = 1
+# magic, format version, byte order (0 little / 1 big), JSON header length
+PREAMBLE = struct.Struct("<8sIII")
+ALIGN = 8
+NO_STRING = -1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _Writer:
+    """
+    Collects interned strings and column sections, then lays them out in one file.
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+        self._sections: Dict[str, Tuple[str, bytes]] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        index = self._strings.get(value)
+        if index is None:
+            index = self._strings[value] = len(self._strings)
+        return index
+
+    def column(self, name: str, typecode: str, values):
+        self._sections[name] = (typecode, array(typecode, values).tobytes())
+
+    def blob(self, name: str, chunks: List[bytes]):
+        # Concatenated chunks plus an (n + 1) offset column, like the string table
+        offsets = [0]
+        for chunk in chunks:
+            offsets.append(offsets[-1] + len(chunk))
+        self.column(name + ".offsets", "Q", offsets)
+        self._sections[name] = ("B", b"".join(chunks))
+
+    def write(self, path: str, meta: dict):
+        encoded = [s.encode("utf-8") for s in self._strings]
+        self.blob("strings", encoded)
+
+        # Section offsets are relative to the first section, which starts aligned after the header
+        layout, offset = {}, 0
+        for name, (typecode, data) in self._sections.items():
+            layout[name] = [offset, len(data), typecode]
+            offset += len(data) + (-len(data) % ALIGN)
+        header = json.dumps(dict(meta, sections=layout)).encode("utf-8")
+        base = PREAMBLE.size + len(header)
+        base += -base % ALIGN
+
+        with open(path, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0 if sys.byteorder == "little" else 1, len(header)))
+            f.write(header)
+            f.write(b"\0" * (base - PREAMBLE.size - len(header)))
+            for name, (_, data) in self._sections.items():
+                f.write(data)
+                f.write(b"\0" * (-len(data) % ALIGN))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def build(db: Session, path: Optional[str] = None) -> dict:
+    """
+    Compile the database into a snapshot file and atomically replace the one at path.
+    Returns the snapshot's metadata.
+    """
+    path = path or settings.snapshot_path
+    data_version = crud.get_data_version(db)
+    countries = sorted(crud.get_all_countries(db), key=lambda c: c.id)
+    details = crud.get_all_cultural_details(db)
+    questions = crud.get_all_quiz_questions(db)
+
+    details_by_country: Dict[int, list] = {}
+    for d in details:
+        details_by_country.setdefault(d.country_id, []).append(d)
+    questions_by_country: Dict[int, list] = {}
+    for q in questions:
+        questions_by_country.setdefault(q.country_id, []).append(q)
+
+    w = _Writer()
+    detail_rows, question_rows = [], []
+    detail_starts, question_starts = [0], [0]
+    guides, etags = [], []
+    encodings = supported_encodings()
+    variants: Dict[str, list] = {encoding: [] for encoding in encodings}
+    for c in countries:
+        country_details = details_by_country.get(c.id, [])
+        detail_rows += country_details
+        detail_starts.append(len(detail_rows))
+        question_rows += questions_by_country.get(c.id, [])
+        question_starts.append(len(question_rows))
+        # Byte-identical to what the API builds from the database, ETag included
+        body = serialize(build_guide(c, country_details))
+        guides.append(body)
+        etags.append(w.intern(make_etag(body)))
+        for encoding in encodings:
+            variants[encoding].append(compress(body, encoding))
+
+    w.column("countries.id", "q", [c.id for c in countries])
+    w.column("countries.name", "i", [w.intern(c.name) for c in countries])
+    w.column("countries.language", "i", [w.intern(c.language) for c in countries])
+    w.column("countries.details", "Q", detail_starts)
+    w.column("countries.questions", "Q", question_starts)
+    w.column("countries.etag", "i", etags)
+    w.blob("guides", guides)
+    for encoding in encodings:
+        w.blob(f"guides.{encoding}", variants[encoding])
+
+    w.column("details.id", "q", [d.id for d in detail_rows])
+    w.column("details.category", "i", [w.intern(d.category) for d in detail_rows])
+    w.column("details.topic", "i", [w.intern(d.topic) for d in detail_rows])
+    w.column("details.description", "i", [w.intern(d.description) for d in detail_rows])
+    w.column("details.is_strict", "B", [1 if d.is_strict else 0 for d in detail_rows])
+
+    w.column("questions.id", "q", [q.id for q in question_rows])
+    w.column("questions.question", "i", [w.intern(q.question) for q in question_rows])
+    w.column("questions.options", "i", [w.intern(option) for q in question_rows
+                                        for option in (q.option_a, q.option_b, q.option_c, q.option_d)])
+    w.column("questions.answer", "i", [w.intern(q.answer) for q in question_rows])
+
+    meta = {
+        "data_version": data_version,
+        "built_at": time.time(),
+        "countries": len(countries),
+        "details": len(detail_rows),
+        "questions": len(question_rows),
+        "encodings": list(encodings),
+    }
+    # A unique name, so two builds (another worker, or a second thread here) never share a file
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        # mkstemp creates it private; the workers may run as another user
+        os.chmod(tmp, 0o644)
+        w.write(tmp, meta)
+        # Atomic on POSIX; processes that still map the old file keep their pages
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return meta
+
+
+class QuizView(Sequence):
+    """
+    One country's quiz questions, decoded into API dicts only when indexed.
+    """
+
+    def __init__(self, snapshot: "Snapshot", start: int, end: int):
+        self._snapshot = snapshot
+        self._start = start
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._snapshot.question(self._start + index)
+
+
+class SnapshotPayload:
+    """
+    A guide body and its compressed variants, straight from the mapping
+    (same interface as guide_cache.CachedPayload).
+    """
+    __slots__ = ("body", "etag", "_variants")
+
+    def __init__(self, body, etag: str, variants: Dict[str, memoryview]):
+        self.body = body
+        self.etag = etag
+        self._variants = variants
+
+    def encoded(self, encoding: str):
+        variant = self._variants.get(encoding)
+        # Built with an encoding the snapshot doesn't have (e.g. brotli installed since)
+        return variant if variant is not None else compress(bytes(self.body), encoding)
+
+
+class Snapshot:
+    """
+    A mapped snapshot file. All accessors read from the mapping; nothing is
+    decoded up front.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        if len(buf) < PREAMBLE.size:
+            raise SnapshotError(f"{path} is not a snapshot")
+        magic, fmt, byteorder, header_len = PREAMBLE.unpack_from(buf)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise SnapshotError(f"{path} is not a format {FORMAT_VERSION} snapshot")
+        if byteorder != (0 if sys.byteorder == "little" else 1):
+            raise SnapshotError(f"{path} was built on a machine with a different byte order")
+        self.meta = json.loads(bytes(buf[PREAMBLE.size:PREAMBLE.size + header_len]))
+        self.data_version = self.meta["data_version"]
+        self.path = path
+
+        base = PREAMBLE.size + header_len
+        base += -base % ALIGN
+        self._s: Dict[str, memoryview] = {}
+        for name, (offset, length, typecode) in self.meta["sections"].items():
+            if base + offset + length > len(buf):
+                raise SnapshotError(f"{path} is truncated")
+            section = buf[base + offset:base + offset + length]
+            self._s[name] = section.cast(typecode) if typecode != "B" else section
+
+        s = self._s
+        self._country_ids = s["countries.id"]
+        self._string_offsets, self._strings = s["strings.offsets"], s["strings"]
+        self._encodings = self.meta["encodings"]
+
+    def string(self, index: int) -> Optional[str]:
+        if index == NO_STRING:
+            return None
+        offsets = self._string_offsets
+        return str(self._strings[offsets[index]:offsets[index + 1]], "utf-8")
+
+    def _blob(self, name: str, index: int) -> memoryview:
+        offsets = self._s[name + ".offsets"]
+        return self._s[name][offsets[index]:offsets[index + 1]]
+
+    def _row(self, country_id: int) -> Optional[int]:
+        # Countries are sorted by id
+        ids = self._country_ids
+        row = bisect.bisect_left(ids, country_id)
+        return row if row < len(ids) and ids[row] == country_id else None
+
+    def countries(self) -> List[Tuple[int, str, Optional[str]]]:
+        """
+        (id, name, language) of every country, by id.
+        """
+        names, languages = self._s["countries.name"], self._s["countries.language"]
+        return [(self._country_ids[row], self.string(names[row]), self.string(languages[row]))
+                for row in range(len(self._country_ids))]
+
+    def details(self, country_id: int) -> List[DetailRecord]:
+        row = self._row(country_id)
+        if row is None:
+            return []
+        s = self._s
+        starts = s["countries.details"]
+        ids, categories, topics = s["details.id"], s["details.category"], s["details.topic"]
+        descriptions, strict = s["details.description"], s["details.is_strict"]
+        return [
+            DetailRecord(ids[i], country_id, self.string(categories[i]), self.string(topics[i]),
+                         self.string(descriptions[i]), bool(strict[i]))
+            for i in range(starts[row], starts[row + 1])
+        ]
+
+    def question(self, i: int) -> dict:
+        s = self._s
+        options = s["questions.options"]
+        return {
+            "id": s["questions.id"][i],
+            "question": self.string(s["questions.question"][i]),
+            "options": [self.string(options[4 * i + k]) for k in range(4)],
+            "answer": self.string(s["questions.answer"][i]),
+        }
+
+    def questions(self, country_id: int) -> Sequence:
+        row = self._row(country_id)
+        if row is None:
+            return ()
+        starts = self._s["countries.questions"]
+        return QuizView(self, starts[row], starts[row + 1])
+
+    def find_question(self, country_id: int, question_id: int) -> Optional[dict]:
+        """
+        One of a country's questions by id. Its rows are sorted by id (see build()),
+        so this is a binary search over the mapped column; only the match is decoded.
+        """
+        row = self._row(country_id)
+        if row is None:
+            return None
+        starts, ids = self._s["countries.questions"], self._s["questions.id"]
+        i = bisect.bisect_left(ids, question_id, starts[row], starts[row + 1])
+        if i < starts[row + 1] and ids[i] == question_id:
+            return self.question(i)
+        return None
+
+    def guide(self, country_id: int) -> Optional[SnapshotPayload]:
+        row = self._row(country_id)
+        if row is None:
+            return None
+        variants = {encoding: self._blob("guides." + encoding, row) for encoding in self._encodings}
+        return SnapshotPayload(self._blob("guides", row), self.string(self._s["countries.etag"][row]), variants)
+
+
+class SnapshotStore:
+    """
+    The current Snapshot for a path. current() re-checks the file at most every
+    check_interval seconds and maps a replaced file; the swap is a single
+    reference assignment, so readers see either the old or the new snapshot.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None,
+                 enabled: Optional[bool] = None, clock: Callable[[], float] = time.monotonic):
+        self.path = path or settings.snapshot_path
+        self.check_interval = settings.snapshot_check_interval if check_interval is None else check_interval
+        self.enabled = settings.snapshot_enabled if enabled is None else enabled
+        self._clock = clock
+        self._snapshot: Optional[Snapshot] = None
+        self._identity = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.swaps = 0
+
+    def current(self) -> Optional[Snapshot]:
+        if self.enabled and self._clock() >= self._next_check:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self):
+        with self._lock:
+            self._next_check = self._clock() + self.check_interval
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                # Keep serving a mapped snapshot whose file was removed; its pages stay valid
+                return
+            identity = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+            if identity == self._identity:
+                return
+            try:
+                snapshot = Snapshot(self.path)
+            except (OSError, ValueError, KeyError, SnapshotError) as e:
+                logger.warning("Ignoring snapshot %s: %s", self.path, e)
+                return
+            self._identity = identity
+            # The old mapping is unmapped once the last request using it lets go
+            self._snapshot = snapshot
+            self.swaps += 1
+            logger.info("Mapped snapshot %s (data version %s)", self.path, snapshot.data_version)
+
+    def ensure_current(self, db: Session):
+        """
+        Rebuild the file if it is missing or older than the database (warm-up step).
+        """
+        if not self.enabled:
+            return
+        # The warm-up thread and a catalog reload can both get here; the second one
+        # waits and then finds the file the first one wrote
+        with self._build_lock:
+            data_version = crud.get_data_version(db)
+            # Look at the file now, another worker may just have rebuilt it
+            self.refresh()
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.data_version != data_version:
+                build(db, self.path)
+                self.refresh()
+
+
+# Shared instance used by the catalog, quiz bank, guides and ChatService
+snapshot_store = SnapshotStore()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Compile the database into a read-only snapshot for the workers.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--path", help="Output file (default: settings.snapshot_path)")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        result = build(session, args.path)
+    finally:
+        session.close()
+    size = os.path.getsize(args.path or settings.snapshot_path)
+    print(f"Compiled {result['countries']} countries, {result['details']} details and "
+          f"{result['questions']} questions ({size / 1e6:.1f}MB) in {time.perf_counter() - started:.1f}s")
@@ -1,6 +1,6 @@
-from models import Base
-from database import engine
+from app.models import Base
+from app.database import engine
 
-print("Creating tables in PostgreSQL...")
+print(f"Creating tables in {engine.dialect.name} ({engine.url.render_as_string()})...")
 Base.metadata.create_all(bind=engine)
 print("✅ Done! Tables created successfully.")
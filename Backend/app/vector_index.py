@@ -0,0 +1,373 @@
+"""
+Local vector retrieval over cultural details.
+
+Every detail (topic + description) is embedded into a fixed-size vector and
+the vectors are stored as one float32 NumPy matrix, grouped by country so a
+country's rows form a contiguous slice. Queries are embedded in a batch and
+scored with a single matrix product (cosine similarity, vectors are
+L2-normalized), either within one country or across all of them.
+
+The default embedder is a signed feature-hashing TF-IDF over words and
+character trigrams (so "restaurants" still finds "restaurant"). It needs
+nothing beyond NumPy, runs on CPU and never touches the network. Other
+embedders (e.g. a local sentence-transformer) can be plugged in with
+register_embedder().
+
+The index is a rebuildable artifact on disk (see settings.vector_index_path):
+
+    python -m app.vector_index build
+
+and is memory-mapped at load time, so several worker processes share the
+same pages. It is rebuilt automatically when the data version changes.
+"""
+import importlib
+import importlib.util
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from . import crud
+from .config import settings
+from .search import search_terms
+
+
+class _LazyModule:
+    """
+    Imports the module on first attribute access, so importing the app (every
+    worker start, every reload) doesn't pay for NumPy until vectors are used.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Optional dependency; without it chat falls back to full-text search
+np = _LazyModule("numpy")
+_NUMPY_INSTALLED = importlib.util.find_spec("numpy") is not None
+
+logger = logging.getLogger("geopulse.vector_index")
+
+# Bump when the file layout or the terms fed to the embedder (search.search_terms) change
+FORMAT_VERSION = 3
+CHAR_NGRAM = 3
+CHAR_NGRAM_WEIGHT = 0.5  # relative to whole-word features
+
+
+def available() -> bool:
+    return _NUMPY_INSTALLED
+
+
+def _hash(feature: str) -> int:
+    # Stable across processes (the builtin hash() is salted)
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of words and character trigrams, weighted by TF-IDF.
+
+    Embedders implement fit(texts), embed(texts) -> (n, dim) float32 array with
+    unit-length rows, and save(path)/load(path) for whatever state fit() learned.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        # term -> [(bucket, signed weight), ...]; the vocabulary is small, so memoize
+        self._features: Dict[str, list] = {}
+
+    def _term_features(self, term: str):
+        features = self._features.get(term)
+        if features is None:
+            grams = [(term, 1.0)]
+            padded = f"#{term}#"
+            grams += [(padded[i:i + CHAR_NGRAM], CHAR_NGRAM_WEIGHT)
+                      for i in range(len(padded) - CHAR_NGRAM + 1)]
+            features = []
+            for gram, weight in grams:
+                h = _hash(gram)
+                features.append((h % self.dim, weight if h & 0x80000000 else -weight))
+            self._features[term] = features
+        return features
+
+    def _counts(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for term in search_terms(text):
+            for bucket, weight in self._term_features(term):
+                counts[bucket] = counts.get(bucket, 0.0) + weight
+        return counts
+
+    def fit(self, texts: Sequence[str]):
+        df = np.zeros(self.dim, dtype=np.float64)
+        for text in texts:
+            buckets = list(self._counts(text))
+            df[buckets] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]):
+        rows, cols, values = [], [], []
+        for i, text in enumerate(texts):
+            for bucket, count in self._counts(text).items():
+                if count:
+                    # Sublinear term frequency, sign preserved
+                    rows.append(i)
+                    cols.append(bucket)
+                    values.append(math.copysign(math.log1p(abs(count)), count))
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(values, dtype=np.float32))
+        matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def save(self, path: str):
+        np.save(os.path.join(path, "idf.npy"), self.idf)
+
+    def load(self, path: str):
+        self.idf = np.load(os.path.join(path, "idf.npy"))
+
+
+EMBEDDERS: Dict[str, Callable[[int], object]] = {"hashing": HashingEmbedder}
+
+
+def register_embedder(name: str, factory: Callable[[int], object]):
+    """
+    Make a custom embedder selectable with GEOPULSE_VECTOR_EMBEDDER=<name>.
+    factory(dim) must return an object with the HashingEmbedder interface.
+    """
+    EMBEDDERS[name] = factory
+
+
+def detail_text(detail) -> str:
+    return f"{detail.topic}. {detail.description}"
+
+
+@dataclass
+class VectorHit:
+    detail_id: int
+    country_id: int
+    score: float
+
+
+class VectorIndex:
+    """
+    Detail vectors plus the ids needed to map rows back to details and countries.
+    """
+
+    def __init__(self, path: Optional[str] = None, embedder: Optional[str] = None, dim: Optional[int] = None):
+        self.path = path or settings.vector_index_path
+        self.embedder_name = embedder or settings.vector_embedder
+        self.dim = dim or settings.vector_dim
+        self.embedder = None
+        self.vectors = None
+        self.detail_ids = None
+        self.country_ids = None
+        # country_id -> (start, end) row slice
+        self._slices: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        # Serializes loads, so a warm-up and a request never build the index twice at once
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.data_version = None
+        # Catalog version the index was last (re)loaded for, see ensure_loaded()
+        self._loaded_for = None
+
+    def _new_embedder(self):
+        if self.embedder_name not in EMBEDDERS:
+            raise ValueError(f"Unknown embedder '{self.embedder_name}'")
+        return EMBEDDERS[self.embedder_name](self.dim)
+
+    def build(self, db: Session):
+        """
+        Embed every detail from the database and swap the result in (not saved to disk).
+        """
+        data_version = crud.get_data_version(db)
+        details = crud.get_all_cultural_details(db)
+        texts = [detail_text(d) for d in details]
+        embedder = self._new_embedder()
+        embedder.fit(texts)
+        vectors = embedder.embed(texts) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        detail_ids = np.array([d.id for d in details], dtype=np.int64)
+        country_ids = np.array([d.country_id for d in details], dtype=np.int64)
+        self._swap(embedder, vectors, detail_ids, country_ids, data_version)
+
+    def save(self):
+        """
+        Write the index next to any existing one and move it into place, so readers
+        (including other processes with it mapped) never see a half-written artifact.
+        """
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, "vectors.npy"), np.ascontiguousarray(self.vectors, dtype=np.float32))
+        np.save(os.path.join(tmp, "detail_ids.npy"), self.detail_ids)
+        np.save(os.path.join(tmp, "country_ids.npy"), self.country_ids)
+        self.embedder.save(tmp)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": FORMAT_VERSION,
+                "data_version": self.data_version,
+                "embedder": self.embedder_name,
+                "dim": self.dim,
+                "count": int(len(self.detail_ids)),
+            }, f)
+
+        old = f"{self.path}.old-{os.getpid()}"
+        if os.path.exists(self.path):
+            os.rename(self.path, old)
+        os.rename(tmp, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def read_meta(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_file(self) -> bool:
+        """
+        Map the on-disk artifact. Returns False if it is missing or was built differently.
+        """
+        meta = self.read_meta()
+        if (not meta or meta.get("format") != FORMAT_VERSION
+                or meta.get("embedder") != self.embedder_name or meta.get("dim") != self.dim):
+            return False
+        embedder = self._new_embedder()
+        embedder.load(self.path)
+        vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+        detail_ids = np.load(os.path.join(self.path, "detail_ids.npy"))
+        country_ids = np.load(os.path.join(self.path, "country_ids.npy"))
+        self._swap(embedder, vectors, detail_ids, country_ids, meta["data_version"])
+        return True
+
+    def load(self, db: Session):
+        """
+        Use the artifact on disk if it matches the current data, otherwise rebuild
+        it (and try to save it for the next process).
+        """
+        data_version = crud.get_data_version(db)
+        meta = self.read_meta()
+        if meta and meta.get("data_version") == data_version and self.load_file():
+            return
+        self.build(db)
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning("Could not save vector index to %s: %s", self.path, e)
+
+    def is_stale(self, data_version=None) -> bool:
+        if not self.loaded:
+            return True
+        # A version we already reloaded for doesn't count, even if the database has
+        # moved on again in between; the catalog will report that one next
+        return data_version is not None and data_version not in (self.data_version, self._loaded_for)
+
+    def ensure_loaded(self, db: Session, data_version=None):
+        """
+        Load on first use, and reload when data_version (the catalog's) differs from
+        the one the index was built from. The reload maps the artifact if another
+        process has already rebuilt it, otherwise it rebuilds it in this request.
+        """
+        if self.is_stale(data_version):
+            with self._load_lock:
+                if self.is_stale(data_version):
+                    self.load(db)
+                    self._loaded_for = data_version
+
+    def _swap(self, embedder, vectors, detail_ids, country_ids, data_version):
+        # Rows are ordered by country, so each country is one contiguous slice
+        slices = {}
+        if len(country_ids):
+            boundaries = np.flatnonzero(np.diff(country_ids)) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(country_ids)]))
+            slices = {int(country_ids[s]): (int(s), int(e)) for s, e in zip(starts, ends)}
+        with self._lock:
+            self.embedder = embedder
+            self.vectors = vectors
+            self.detail_ids = detail_ids
+            self.country_ids = country_ids
+            self._slices = slices
+            self.data_version = data_version
+            self.loaded = True
+
+    def query(self, texts: Sequence[str], country_ids: Optional[Sequence[Optional[int]]] = None,
+              k: int = 3, min_score: float = 0.0) -> List[List[VectorHit]]:
+        """
+        Top-k details for each text, best first. country_ids[i] scopes text i to one
+        country (None searches every country). All queries are embedded together and
+        queries sharing a scope are scored with one matrix product.
+        """
+        if country_ids is None:
+            country_ids = [None] * len(texts)
+        results: List[List[VectorHit]] = [[] for _ in texts]
+        if not texts or not self.loaded:
+            return results
+
+        with self._lock:
+            embedder, vectors, detail_ids, all_country_ids, slices = (
+                self.embedder, self.vectors, self.detail_ids, self.country_ids, self._slices)
+
+        queries = embedder.embed(texts)
+        groups: Dict[Optional[int], List[int]] = {}
+        for i, country_id in enumerate(country_ids):
+            groups.setdefault(country_id, []).append(i)
+
+        for country_id, members in groups.items():
+            start, end = (0, len(detail_ids)) if country_id is None else slices.get(country_id, (0, 0))
+            if start == end:
+                continue
+            scores = queries[members] @ vectors[start:end].T
+            top = min(k, end - start)
+            best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            for row, i in enumerate(members):
+                ranked = sorted(best[row], key=lambda j: -scores[row, j])
+                results[i] = [
+                    VectorHit(int(detail_ids[start + j]), int(all_country_ids[start + j]), float(scores[row, j]))
+                    for j in ranked if scores[row, j] > min_score
+                ]
+        return results
+
+
+# Shared instance used by ChatService
+vector_index = VectorIndex()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build the vector index artifact for chat retrieval.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--path", help="Output directory (default: settings.vector_index_path)")
+    parser.add_argument("--dim", type=int, help="Vector size (default: settings.vector_dim)")
+    args = parser.parse_args()
+
+    if not available():
+        parser.error("NumPy is required to build the vector index (pip install numpy)")
+    index = VectorIndex(path=args.path, dim=args.dim)
+    session = SessionLocal()
+    try:
+        index.build(session)
+    finally:
+        session.close()
+    index.save()
+    print(f"Indexed {len(index.detail_ids)} details ({index.dim} dims) into {index.path}")
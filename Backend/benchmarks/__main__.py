@@ -0,0 +1,63 @@
+"""
+Run the benchmark suites and write one results file:
+
+    python -m benchmarks --database /tmp/bench.db --output results/HEAD.json
+    python -m benchmarks.compare results/base.json results/HEAD.json
+
+Generate a large synthetic database first with `python -m benchmarks.generate`.
+"""
+import argparse
+
+from .common import print_table, use_database, write_results
+
+SUITES = ("intent", "micro", "load", "startup", "memory")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run GeoPulse benchmarks.")
+    parser.add_argument("--database", help="SQLite file or SQLAlchemy URL (default: configured database)")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="suites to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=2000, help="micro-benchmark iterations")
+    parser.add_argument("--requests", type=int, default=2000, help="load requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args(argv)
+
+    use_database(args.database)
+    suites = {}
+    selected = args.suite or SUITES
+
+    if "intent" in selected:
+        from . import bench_intent
+        rate = bench_intent.run(args.iterations)
+        suites["intent"] = {"IntentClassifier.classify": {"ops_per_sec": rate}}
+        print(f"\nintent classification: {rate:,.0f} msgs/sec")
+    if "micro" in selected:
+        from . import micro
+        suites["micro"] = micro.run(args.iterations)
+        print_table("micro-benchmarks", suites["micro"])
+    if "load" in selected:
+        from . import load
+        suites["load"] = load.run(args.requests, args.concurrency)
+        print_table(f"HTTP load ({args.concurrency} concurrent clients)", suites["load"])
+    if "startup" in selected:
+        from . import startup
+        suites["startup"] = startup.run()
+        for key, stats in suites["startup"].items():
+            print(f"  cold start {key:<26} p50 {stats['p50_ms']:8.1f}ms")
+    if "memory" in selected:
+        from . import memory
+        suites["memory"] = memory.run()
+        memory.print_results(suites["memory"])
+
+    write_results(args.output, suites, {
+        "database": args.database,
+        "iterations": args.iterations,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+    })
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
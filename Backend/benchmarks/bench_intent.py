@@ -0,0 +1,59 @@
+"""
+Throughput benchmark for the compiled intent classifier.
+
+Run from Backend/:
+    python -m benchmarks.bench_intent [--iterations N] [--min-rate 20000]
+
+Exits non-zero if classifications/sec on this core fall below --min-rate.
+"""
+import argparse
+import sys
+import time
+
+from app.intent_classifier import IntentClassifier
+
+MESSAGES = [
+    "Hello!",
+    "Can I tip in Japan?",
+    "What should I avoid doing at dinner in India?",
+    "Don't people in Thailand mind if you touch their head?",
+    "Tell me about greetings in Brazil",
+    "Is it okay to wear shoes inside a home in Korea?",
+    "Good morning, what are the best practices for business meetings?",
+    "What is considered rude when visiting a temple?",
+    "Can you calculate the weather for tomorrow?",
+    "I'm traveling to Morocco next week and I'm not sure about the dress code, any advice?",
+]
+
+
+def run(iterations: int) -> float:
+    classifier = IntentClassifier.from_file()
+    classify = classifier.classify
+    messages = MESSAGES
+    # Warm up
+    for m in messages:
+        classify(m)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for m in messages:
+            classify(m)
+    elapsed = time.perf_counter() - start
+    return iterations * len(messages) / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--min-rate", type=float, default=20000.0)
+    args = parser.parse_args(argv)
+
+    rate = run(args.iterations)
+    print(f"intent classification: {rate:,.0f} msgs/sec")
+    if rate < args.min_rate:
+        print(f"FAIL: below required {args.min_rate:,.0f} msgs/sec")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
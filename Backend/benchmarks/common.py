@@ -0,0 +1,77 @@
+"""
+Shared helpers: database selection, latency summaries and machine-readable result files.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Sequence
+
+
+def use_database(database: str = None):
+    """
+    Point the app at a benchmark database. Must run before any `app` module is imported,
+    because the engines are built from settings at import time.
+    """
+    if database:
+        url = database if "://" in database else "sqlite:///" + os.path.abspath(database)
+        os.environ["GEOPULSE_DATABASE_URL"] = url
+        if "://" not in database:
+            # Keep the benchmark's vector index next to its database, not the app's
+            os.environ["GEOPULSE_VECTOR_INDEX_PATH"] = os.path.abspath(database) + ".vectors"
+            os.environ["GEOPULSE_SNAPSHOT_PATH"] = os.path.abspath(database) + ".snapshot"
+
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    k = (len(sorted_samples) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_samples) - 1)
+    return sorted_samples[lo] + (sorted_samples[hi] - sorted_samples[lo]) * (k - lo)
+
+
+def summarize(samples: List[float], elapsed: float = None) -> Dict[str, float]:
+    """
+    Latency summary of per-operation samples (seconds). `elapsed` is the wall time of
+    the whole run; without it throughput is derived from the summed samples.
+    """
+    ordered = sorted(samples)
+    total = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "count": len(ordered),
+        "mean_us": (sum(ordered) / len(ordered) * 1e6) if ordered else 0.0,
+        "p50_us": percentile(ordered, 50) * 1e6,
+        "p95_us": percentile(ordered, 95) * 1e6,
+        "p99_us": percentile(ordered, 99) * 1e6,
+        "max_us": (ordered[-1] * 1e6) if ordered else 0.0,
+        "ops_per_sec": (len(ordered) / total) if total else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(path: str, suites: Dict[str, Dict[str, dict]], meta: dict = None):
+    document = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "meta": meta or {},
+        "suites": suites,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def print_table(title: str, results: Dict[str, dict]):
+    print(f"\n{title}")
+    print(f"  {'name':<38}{'ops/s':>12}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}")
+    for name, r in results.items():
+        print(f"  {name:<38}{r['ops_per_sec']:>12,.0f}{r['p50_us']:>11,.1f}{r['p95_us']:>11,.1f}{r['p99_us']:>11,.1f}")
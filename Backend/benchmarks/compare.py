@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files and flag regressions:
+
+    python -m benchmarks.compare base.json head.json [--threshold 10]
+
+Exits non-zero if any benchmark's throughput dropped, or its p99 latency
+(median for cold start) grew, by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def pct_change(old, new):
+    return (new - old) / old * 100.0 if old else 0.0
+
+
+def compare(base, head, threshold):
+    regressions = []
+    rows = []
+    for suite, results in head["suites"].items():
+        for name, new in results.items():
+            old = base["suites"].get(suite, {}).get(name)
+            if old is None:
+                continue
+            throughput = pct_change(old.get("ops_per_sec", 0), new.get("ops_per_sec", 0))
+            # Latency suites report p99 in microseconds; cold start reports a median in ms
+            latency = "p99_us" if "p99_us" in new else "p50_ms"
+            p99 = pct_change(old.get(latency, 0), new.get(latency, 0))
+            regressed = throughput < -threshold or p99 > threshold
+            rows.append((f"{suite}: {name}", throughput, p99, regressed))
+            if regressed:
+                regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare GeoPulse benchmark results.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    print(f"base {base['commit'][:10]}  ->  head {head['commit'][:10]}")
+    rows, regressions = compare(base, head, args.threshold)
+    for name, throughput, p99, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {name:<52} ops/s {throughput:+7.1f}%   p99 {p99:+7.1f}%{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0f}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Synthetic large-dataset generator.
+
+Builds a database with N countries x M details x Q quiz questions through the
+bulk seed loader, so benchmarks can see how lookups scale:
+
+    python -m benchmarks.generate --database /tmp/bench.db --countries 10000 --details 500 --questions 200
+"""
+import argparse
+import random
+from typing import Iterator
+
+from app.database import build_engine
+from app.migrations import upgrade
+from app.seed_loader import bulk_load
+
+CATEGORIES = ["GREETING", "ETIQUETTE", "DINING", "DOs & DONTs", "COMMON MISTAKES", "SITUATIONAL TIPS", "BUSINESS"]
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "bu", "sha", "vor", "ne", "qui", "dal", "ori", "zan", "pe", "lu", "mar"]
+VOCABULARY = (
+    "greet bow handshake shoes temple tipping restaurant gift wrap business card dress code modest "
+    "punctual elders chopsticks right hand left hand eye contact queue shrine market bargain tea "
+    "coffee invitation host guest compliment toast alcohol photograph smile kiss cheek public "
+    "transport silence loud respect religion festival offensive polite avoid always never"
+).split()
+
+
+def country_name(rng: random.Random, index: int) -> str:
+    word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    # The index keeps names unique however the syllables fall
+    return f"{word} {index}"
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + "."
+
+
+def iter_records(countries: int, details: int, questions: int, seed: int = 42) -> Iterator[dict]:
+    rng = random.Random(seed)
+    for i in range(countries):
+        yield {
+            "name": country_name(rng, i),
+            "language": rng.choice(["Local", "English", "French", "Spanish", "Arabic"]),
+            "details": [
+                {
+                    "category": CATEGORIES[j % len(CATEGORIES)],
+                    "topic": "Do" if j == 3 else "Don't" if j == 10 else f"{rng.choice(VOCABULARY).title()} {j}",
+                    "description": sentence(rng, rng.randint(8, 20)),
+                    "is_strict": rng.random() < 0.3,
+                }
+                for j in range(details)
+            ],
+            "quiz": [
+                {
+                    "question": f"Q{j}: {sentence(rng, 8)}",
+                    "option_a": sentence(rng, 3),
+                    "option_b": sentence(rng, 3),
+                    "option_c": sentence(rng, 3),
+                    "option_d": sentence(rng, 3),
+                    "answer": "A",
+                }
+                for j in range(questions)
+            ],
+        }
+
+
+def generate(database: str, countries: int, details: int, questions: int, seed: int = 42):
+    url = database if "://" in database else f"sqlite:///{database}"
+    engine = build_engine(url)
+    upgrade(engine)
+    # Small batches keep memory bounded for very wide countries
+    batch_size = max(1, 50_000 // max(details + questions, 1))
+    stats = bulk_load(engine, iter_records(countries, details, questions, seed), batch_size=batch_size)
+    engine.dispose()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic GeoPulse database.")
+    parser.add_argument("--database", required=True, help="SQLite file path or SQLAlchemy URL")
+    parser.add_argument("--countries", type=int, default=1000)
+    parser.add_argument("--details", type=int, default=50, help="details per country")
+    parser.add_argument("--questions", type=int, default=20, help="quiz questions per country")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(generate(args.database, args.countries, args.details, args.questions, args.seed))
+
+
+if __name__ == "__main__":
+    main()
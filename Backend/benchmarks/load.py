@@ -0,0 +1,116 @@
+"""
+In-process HTTP load driver.
+
+Drives the ASGI app directly through httpx (no sockets, no uvicorn), with a
+fixed number of concurrent clients per endpoint, and reports p50/p95/p99
+latency and requests/sec:
+
+    python -m benchmarks.load --database /tmp/bench.db [--requests 2000] [--concurrency 32] [--output load.json]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List
+
+from .common import print_table, summarize, use_database, write_results
+
+
+def scenarios(names: List[str], rng: random.Random, questions: List[tuple] = ()) -> Dict[str, Callable]:
+    """
+    Endpoint name -> function(client) returning an awaitable response.
+    questions are (country name, question id, options) for the quiz attempt scenario.
+    """
+    pick = lambda: rng.choice(names)  # noqa: E731
+    requests = {
+        "GET /api/guide/{country}": lambda c: c.get(f"/api/guide/{pick()}"),
+        "GET /api/guides?names=": lambda c: c.get("/api/guides", params={"names": ",".join(rng.sample(names, min(10, len(names))))}),
+        "GET /api/countries": lambda c: c.get("/api/countries"),
+        "GET /api/quiz/{country}": lambda c: c.get(f"/api/quiz/{pick()}"),
+        "POST /api/chat": lambda c: c.post("/api/chat", json={"message": f"Can I tip in {pick()}?", "country": "general"}),
+        "POST /api/chat/batch": lambda c: c.post("/api/chat/batch", json={
+            "messages": [{"message": "What should I avoid?", "country": pick()} for _ in range(20)]}),
+    }
+    if questions:
+        def attempt(c):
+            name, question_id, options = rng.choice(questions)
+            return c.post(f"/api/quiz/{name}/attempts",
+                          json={"attempts": [{"question_id": question_id, "answer": rng.choice(options)}]})
+        requests["POST /api/quiz/{country}/attempts"] = attempt
+    return requests
+
+
+async def drive(client, request: Callable, total: int, concurrency: int) -> Dict[str, float]:
+    samples, errors = [], 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        perf = time.perf_counter
+        while remaining > 0:
+            remaining -= 1
+            start = perf()
+            response = await request(client)
+            samples.append(perf() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(samples, time.perf_counter() - started)
+    result["errors"] = errors
+    return result
+
+
+async def run_async(requests: int, concurrency: int, only: List[str] = None, seed: int = 11) -> Dict[str, dict]:
+    import httpx
+    from app.main import app
+    from app.catalog import catalog
+    from app.quiz_bank import quiz_bank
+    from app.admission import admission_controller
+
+    # One client driving every endpoint flat out: measure the endpoints, not the rate limits
+    admission_controller.enabled = False
+
+    results = {}
+    # Run the app's startup/shutdown hooks around the whole run
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Measure steady state: wait for the background warm-up to finish
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.01)
+            rng = random.Random(seed)
+            names = [c.name for c in catalog.all()]
+            questions = [(c.name, q["id"], q["options"]) for c in rng.sample(catalog.all(), min(200, len(names)))
+                         for q in quiz_bank.questions(c.id)]
+            for name, request in scenarios(names, rng, questions).items():
+                if only and not any(o in name for o in only):
+                    continue
+                results[name] = await drive(client, request, requests, concurrency)
+    return results
+
+
+def run(requests: int = 2000, concurrency: int = 32, only: List[str] = None) -> Dict[str, dict]:
+    return asyncio.run(run_async(requests, concurrency, only))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GeoPulse in-process HTTP load driver.")
+    parser.add_argument("--database", help="SQLite file or SQLAlchemy URL (default: configured database)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--only", action="append", help="substring filter on endpoint names (repeatable)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    use_database(args.database)
+    results = run(args.requests, args.concurrency, args.only)
+    print_table(f"HTTP load ({args.concurrency} concurrent clients)", results)
+    if args.output:
+        write_results(args.output, {"load": results},
+                      {"database": args.database, "requests": args.requests, "concurrency": args.concurrency})
+
+
+if __name__ == "__main__":
+    main()
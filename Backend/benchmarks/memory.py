@@ -0,0 +1,137 @@
+"""
+Per-worker memory with and without the shared snapshot (app/snapshot.py).
+
+Starts N worker processes side by side. Each one imports the app, warms the
+catalog and quiz bank, and reads every guide and quiz once, like a worker
+that has served all countries. Each then reports its memory from
+/proc/self/smaps_rollup (Linux):
+
+    python -m benchmarks.memory --database /tmp/bench.db [--workers 1 2 4]
+
+"private" is what a worker holds on its own (unique set size); "pss" splits
+shared pages between the processes mapping them. With the snapshot, the
+private memory per worker should stay flat as workers are added.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import zlib
+from typing import Dict, List
+
+from .common import use_database, write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("database", "snapshot")
+
+
+def read_memory() -> Dict[str, float]:
+    fields = {}
+    with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    return {
+        "rss_mb": fields.get("Rss", 0.0),
+        "pss_mb": fields.get("Pss", 0.0),
+        "private_mb": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def _child():
+    from app import crud, database, lifecycle
+    from app.catalog import catalog
+    from app.guide_cache import build_guide, guide_cache
+    from app.quiz_bank import quiz_bank
+    from app.snapshot import snapshot_store
+
+    steps = [(name, step) for name, step in lifecycle.warm_up_steps() if name != "vector_index"]
+    lifecycle.warm_up(steps)
+    db = database.SessionLocal()
+    try:
+        countries = catalog.all()
+        snapshot = snapshot_store.current()
+        touched = 0
+        for i in range(0, len(countries), 200):
+            batch = countries[i:i + 200]
+            if snapshot is not None:
+                payloads = [snapshot.guide(c.id) for c in batch]
+            else:
+                payloads = [guide_cache.put(catalog.data_version, c.id, build_guide(c, c.details))
+                            for c in crud.get_countries_with_details(db, [c.id for c in batch])]
+            # crc32 reads the body in place, so snapshot pages are touched without copying
+            touched += sum(zlib.crc32(p.body) & 1 for p in payloads)
+            for c in batch:
+                quiz_bank.page([c.id])
+    finally:
+        db.close()
+    print(json.dumps(read_memory()), flush=True)
+    # Stay alive until the parent has heard from every worker, so they overlap
+    sys.stdin.read()
+
+
+def measure(mode: str, workers: int) -> Dict[str, float]:
+    env = dict(os.environ, GEOPULSE_SNAPSHOT_ENABLED="true" if mode == "snapshot" else "false")
+    children = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.memory", "--child"], cwd=BACKEND_DIR, env=env,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    reports: List[dict] = []
+    try:
+        for child in children:
+            line = child.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{mode} worker exited without reporting")
+            reports.append(json.loads(line))
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+    return {
+        "private_mb_per_worker": sum(r["private_mb"] for r in reports) / workers,
+        "rss_mb_per_worker": sum(r["rss_mb"] for r in reports) / workers,
+        "pss_mb_total": sum(r["pss_mb"] for r in reports),
+    }
+
+
+def run(workers=(1, 2, 4)) -> Dict[str, dict]:
+    from app import migrations
+
+    migrations.upgrade()
+    results = {}
+    for mode in MODES:
+        for n in workers:
+            results[f"{mode} x{n}"] = measure(mode, n)
+    return results
+
+
+def print_results(results: Dict[str, dict]):
+    print(f"\n  {'workers':<16}{'private MB/worker':>20}{'RSS MB/worker':>16}{'PSS MB total':>15}")
+    for name, r in results.items():
+        print(f"  {name:<16}{r['private_mb_per_worker']:>20,.1f}{r['rss_mb_per_worker']:>16,.1f}"
+              f"{r['pss_mb_total']:>15,.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GeoPulse per-worker memory benchmark.")
+    parser.add_argument("--database", help="SQLite file or SQLAlchemy URL (default: configured database)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child()
+        return
+    use_database(args.database)
+    results = run(args.workers)
+    print_results(results)
+    if args.output:
+        write_results(args.output, {"memory": results}, {"database": args.database, "workers": args.workers})
+
+
+if __name__ == "__main__":
+    main()
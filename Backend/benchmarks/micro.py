@@ -0,0 +1,95 @@
+"""
+Micro-benchmarks for the crud lookups and ChatService tools.
+
+    python -m benchmarks.micro --database /tmp/bench.db [--iterations 2000] [--output micro.json]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+from .common import print_table, summarize, use_database, write_results
+
+CHAT_MESSAGES = [
+    "Hello!",
+    "Can I tip here?",
+    "What should I avoid at dinner?",
+    "Tell me about greetings",
+    "Is it okay to wear shoes inside?",
+]
+
+
+def measure(fn: Callable, inputs: List, iterations: int) -> Dict[str, float]:
+    samples = []
+    perf = time.perf_counter
+    for i in range(iterations):
+        arg = inputs[i % len(inputs)]
+        start = perf()
+        fn(arg)
+        samples.append(perf() - start)
+    return summarize(samples)
+
+
+def run(iterations: int = 2000, seed: int = 7) -> Dict[str, dict]:
+    from app import crud, database, migrations
+    from app.answer_cache import AnswerCache
+    from app.catalog import catalog
+    from app.chat_service import ChatService
+
+    rng = random.Random(seed)
+    # No lifespan here, so bring an older benchmark database up to the current schema first
+    migrations.upgrade()
+    db = database.SessionLocal()
+    try:
+        catalog.load(db)
+        countries = catalog.all()
+        sample = [rng.choice(countries) for _ in range(min(iterations, 500))]
+        names = [c.name for c in sample]
+        messages = [f"{rng.choice(CHAT_MESSAGES)} in {c.name}" for c in sample]
+        chat = ChatService(db)
+        no_cache, answers = AnswerCache(max_entries=0), AnswerCache()
+
+        results = {
+            "crud.get_country_by_name": measure(lambda n: crud.get_country_by_name(db, n), names, iterations),
+            "crud.get_country_by_name (casefold)": measure(
+                lambda n: crud.get_country_by_name(db, n.upper()), names, iterations),
+            "crud.get_cultural_details": measure(lambda c: crud.get_cultural_details(db, c.id), sample, iterations),
+            "crud.get_quiz_questions": measure(lambda c: crud.get_quiz_questions(db, c.id), sample, iterations),
+            "catalog.resolve": measure(catalog.resolve, names, iterations),
+            "catalog.resolve_fuzzy (typo)": measure(
+                catalog.resolve_fuzzy, [n[:2] + n[3:] for n in names], iterations),
+            "catalog.complete": measure(lambda n: catalog.complete(n[:3]), names, iterations),
+            "ChatService.detect_country": measure(lambda m: chat.detect_country(m, "general"), messages, iterations),
+            "ChatService.analyze_intent": measure(chat.analyze_intent, messages, iterations),
+            "ChatService.retrieve_details (batch of 32)": measure(
+                lambda i: chat.retrieve_details([(m, c) for m, c in zip(messages[i:i + 32], sample[i:i + 32])]),
+                list(range(0, max(len(messages) - 32, 1), 32)), max(iterations // 32, 1)),
+            "ChatService.retrieve_details (global)": measure(
+                lambda m: chat.retrieve_details([(m, None)]), messages, max(iterations // 10, 1)),
+            # Fresh service per call and no answer cache, so memoization doesn't hide the database work
+            "ChatService.process_message": measure(
+                lambda m: ChatService(db, answers=no_cache).process_message(m, "general"), messages, iterations),
+            "ChatService.process_message (answer cache)": measure(
+                lambda m: ChatService(db, answers=answers).process_message(m, "general"), messages, iterations),
+        }
+    finally:
+        db.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GeoPulse micro-benchmarks.")
+    parser.add_argument("--database", help="SQLite file or SQLAlchemy URL (default: configured database)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    use_database(args.database)
+    results = run(args.iterations)
+    print_table("micro-benchmarks", results)
+    if args.output:
+        write_results(args.output, {"micro": results}, {"database": args.database, "iterations": args.iterations})
+
+
+if __name__ == "__main__":
+    main()
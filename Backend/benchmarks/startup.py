@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark: fresh interpreter -> app imported -> first request served -> ready.
+
+Each run starts a new Python process (nothing cached in memory), imports the
+app, runs its lifespan and times the first GET /api/countries plus the moment
+/ready turns 200. Fails when the median time to the first served request is
+over the budget (settings.startup_budget_ms unless --budget-ms is given):
+
+    python -m benchmarks.startup --database /tmp/bench.db [--runs 5] [--budget-ms 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict
+
+from .common import use_database, write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _child() -> Dict[str, float]:
+    started = time.perf_counter()
+    import httpx
+    from app.main import app
+    imported = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        lifespan_done = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/api/countries")
+            response.raise_for_status()
+            first_request = time.perf_counter()
+            first_request_at = time.time()
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.005)
+            ready = time.perf_counter()
+
+    return {
+        "import_ms": (imported - started) * 1000,
+        "lifespan_ms": (lifespan_done - imported) * 1000,
+        "first_request_ms": (first_request - started) * 1000,
+        "ready_ms": (ready - started) * 1000,
+        "first_request_at": first_request_at,
+    }
+
+
+def measure_once() -> Dict[str, float]:
+    """
+    One cold start in a fresh interpreter. total_first_request_ms is wall clock from
+    spawning the process, so interpreter start-up is included.
+    """
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        cwd=BACKEND_DIR, env=os.environ.copy(), check=True, capture_output=True, text=True,
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["total_first_request_ms"] = (timings.pop("first_request_at") - spawned) * 1000
+    return timings
+
+
+def run(runs: int = 5) -> Dict[str, dict]:
+    samples = [measure_once() for _ in range(runs)]
+    return {
+        key: {
+            "p50_ms": statistics.median(s[key] for s in samples),
+            "max_ms": max(s[key] for s in samples),
+        }
+        for key in samples[0]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GeoPulse cold-start benchmark.")
+    parser.add_argument("--database", help="SQLite file or SQLAlchemy URL (default: configured database)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="max median cold start to first request")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child())))
+        return
+
+    use_database(args.database)
+    from app.config import settings
+
+    budget = args.budget_ms if args.budget_ms is not None else settings.startup_budget_ms
+    results = run(args.runs)
+    print(f"\ncold start ({args.runs} runs, budget {budget:.0f}ms to first request)")
+    for key, stats in results.items():
+        print(f"  {key:<26} p50 {stats['p50_ms']:8.1f}ms   max {stats['max_ms']:8.1f}ms")
+    if args.output:
+        write_results(args.output, {"startup": results}, {"database": args.database, "runs": args.runs})
+
+    p50 = results["total_first_request_ms"]["p50_ms"]
+    if p50 > budget:
+        print(f"FAIL: cold start to first request {p50:.0f}ms is over the {budget:.0f}ms budget")
+        sys.exit(1)
+    print(f"OK: cold start to first request {p50:.0f}ms (budget {budget:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
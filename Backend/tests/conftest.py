@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+# Importing the app must never touch the developer's database or snapshot. The shared
+# snapshot is off, so the in-memory subsystems read the test databases directly.
+_SCRATCH = tempfile.mkdtemp(prefix="geopulse-tests-")
+os.environ["GEOPULSE_DATABASE_URL"] = "sqlite:///" + os.path.join(_SCRATCH, "app.db")
+os.environ["GEOPULSE_SNAPSHOT_PATH"] = os.path.join(_SCRATCH, "snapshot.bin")
+os.environ["GEOPULSE_SNAPSHOT_ENABLED"] = "false"
+
+import pytest  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import database, migrations  # noqa: E402
+from app.seed_loader import bulk_load  # noqa: E402
+
+
+def question(text: str, answer: str, *wrong: str) -> dict:
+    options = [answer, *wrong]
+    return {"question": text, "option_a": options[0], "option_b": options[1], "option_c": options[2],
+            "option_d": options[3], "answer": answer}
+
+
+RECORDS = [
+    {
+        "name": "Japan",
+        "language": "Japanese",
+        "details": [
+            {"category": "GREETING", "topic": "Bowing", "description": "Bow to greet."},
+            {"category": "DINING", "topic": "Chopsticks", "description": "Never stick them upright in rice."},
+            {"category": "DOs & DONTs", "topic": "Don't", "description": "Don't tip in restaurants."},
+        ],
+        "quiz": [question(f"Japan question {i}?", "Yes", "No", "Maybe", "Never") for i in range(5)],
+    },
+    {
+        "name": "France",
+        "language": "French",
+        "details": [{"category": "GREETING", "topic": "La bise", "description": "Cheek kisses among friends."}],
+        "quiz": [question(f"France question {i}?", "Oui", "Non", "Peut-être", "Jamais") for i in range(3)],
+    },
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    A migrated SQLite database in a temporary directory, seeded with RECORDS.
+    """
+    engine = database.build_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    migrations.upgrade(engine)
+    bulk_load(engine, RECORDS)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
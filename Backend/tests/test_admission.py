@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController, ConcurrencyGate, RoutePolicy, TokenBucket
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2.0, burst=3, now=0.0)
+    assert [bucket.take(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty: the next token is half a second away at 2/s
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.25) == pytest.approx(0.25)
+    assert bucket.take(0.5) == 0.0
+    # Never refills beyond the burst
+    assert [bucket.take(100.0) for _ in range(4)][-1] > 0
+
+
+def test_token_bucket_refund():
+    bucket = TokenBucket(rate=1.0, burst=1, now=0.0)
+    assert bucket.take(0.0) == 0.0
+    bucket.refund()
+    assert bucket.take(0.0) == 0.0
+
+
+def test_route_rate_limit_does_not_charge_the_client():
+    clock = [0.0]
+    controller = AdmissionController(default={}, routes={"/api/chat": {"client_rate": 1, "client_burst": 2,
+                                                                       "rate": 1, "burst": 1}},
+                                     max_clients=10, trust_forwarded_for=False, enabled=True,
+                                     clock=lambda: clock[0])
+    policy = controller.policy("/api/chat")
+    assert controller.check_rate("a", "/api/chat", policy) == (None, 0.0)
+    outcome, _ = controller.check_rate("a", "/api/chat", policy)
+    assert outcome == "route_rate"
+    clock[0] = 1.0
+    # The refunded client token is still there
+    assert controller.check_rate("a", "/api/chat", policy) == (None, 0.0)
+
+
+def test_unknown_setting_fails_at_start_up():
+    with pytest.raises(ValueError):
+        RoutePolicy.from_settings({"client_rate": 1}, {"max_concurrency": 4})
+
+
+def test_concurrency_gate_queues_then_sheds():
+    async def scenario():
+        gate = ConcurrencyGate(limit=1, max_queue=1, timeout=0.05)
+        assert await gate.acquire() is None
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+        assert await gate.acquire() == "queue_full"
+        gate.release()
+        assert await waiter is None and gate.in_flight == 1
+        assert await gate.acquire() == "queue_timeout"
+        gate.release()
+        assert gate.in_flight == 0 and gate.queued == 0
+
+    asyncio.run(scenario())
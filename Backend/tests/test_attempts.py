@@ -0,0 +1,38 @@
+from sqlalchemy import func, select
+
+from app.attempts import Attempt, AttemptRecorder, now
+from app.models import QuizAttempt, QuizQuestion
+
+
+def _attempts(engine, count):
+    with engine.connect() as conn:
+        question_id, country_id = conn.execute(select(QuizQuestion.id, QuizQuestion.country_id)).first()
+    return [Attempt(question_id, country_id, "Yes", i % 2 == 0, now()) for i in range(count)]
+
+
+def test_stop_drains_the_queue(engine):
+    # A long flush interval keeps everything queued until stop()
+    recorder = AttemptRecorder(max_pending=100, batch_size=10, flush_interval=60.0, engine=engine)
+    attempts = _attempts(engine, 25)
+    assert recorder.submit(attempts)
+
+    assert recorder.stop(timeout=10)
+    assert recorder.queue_depth() == 0
+    assert recorder.written == 25 and recorder.batches == 3 and recorder.dropped == 0
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(QuizAttempt)).scalar() == 25
+
+    question = {"id": attempts[0].question_id, "question": "Japan question 0?"}
+    stats = recorder.country_stats(attempts[0].country_id, [question])
+    assert stats["attempts"] == 25 and stats["correct"] == 13
+
+
+def test_full_queue_rejects_the_whole_submission(engine):
+    recorder = AttemptRecorder(max_pending=5, batch_size=10, flush_interval=60.0, engine=engine)
+    assert recorder.submit(_attempts(engine, 4))
+    assert not recorder.submit(_attempts(engine, 2))
+    assert recorder.accepted == 4 and recorder.rejected == 2
+    assert recorder.stop(timeout=10)
+    assert recorder.written == 4
+    # Nothing is accepted once stopping
+    assert not recorder.submit(_attempts(engine, 1))
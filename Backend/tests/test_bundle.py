@@ -0,0 +1,56 @@
+from sqlalchemy import text
+
+from app import bundle, changes, crud
+from app.seed_loader import bulk_load
+
+
+def test_full_bundle_has_every_row(db):
+    document = bundle.build_bundle(db)
+    assert document["version"] == changes.current_version(db) > 0
+    assert [c["name"] for c in document["countries"]] == ["Japan", "France"]
+    assert len(document["details"]) == 4
+    assert len(document["questions"]) == 8
+
+
+def test_delta_lists_changed_rows_and_tombstones(engine, db):
+    since = changes.current_version(db)
+    assert bundle.build_delta(db, since)["countries"] == []
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cultural_details SET description = 'Bow deeply.' WHERE topic = 'Bowing'"))
+        deleted_id = conn.execute(text("SELECT id FROM quiz_questions WHERE question = 'France question 0?'")).scalar()
+        conn.execute(text("DELETE FROM quiz_questions WHERE id = :id"), {"id": deleted_id})
+    bulk_load(engine, [{"name": "Brazil", "language": "Portuguese"}])
+    db.rollback()
+
+    delta = bundle.build_delta(db, since)
+    assert delta["since"] == since
+    assert delta["version"] == changes.current_version(db) > since
+    assert [c["name"] for c in delta["countries"]] == ["Brazil"]
+    assert [d["description"] for d in delta["details"]] == ["Bow deeply."]
+    assert delta["questions"] == []
+    assert delta["deleted"] == {"countries": [], "details": [], "questions": [deleted_id]}
+
+    # Caught up: nothing left to send
+    caught_up = bundle.build_delta(db, delta["version"])
+    assert caught_up["details"] == [] and caught_up["deleted"]["questions"] == []
+
+
+def test_delta_from_an_unknown_version_needs_a_full_bundle(db):
+    assert bundle.build_delta(db, changes.current_version(db) + 1) is None
+
+
+def test_data_version_moves_with_every_change(engine, db):
+    version = crud.get_data_version(db)
+    assert version == changes.current_version(db)
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cultural_details SET description = 'Bow deeply.' WHERE topic = 'Bowing'"))
+    db.rollback()
+    edited = crud.get_data_version(db)
+    assert edited > version
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM quiz_questions WHERE question = 'France question 0?'"))
+    db.rollback()
+    assert crud.get_data_version(db) > edited
@@ -0,0 +1,34 @@
+import pytest
+
+from app.catalog import CountryCatalog
+from app.seed_loader import bulk_load
+
+
+@pytest.fixture
+def catalog(engine, db):
+    bulk_load(engine, [{"name": "United States", "language": "English"},
+                       {"name": "United Kingdom", "language": "English"}])
+    catalog = CountryCatalog()
+    catalog.load(db)
+    return catalog
+
+
+def _names(records):
+    return [r.name for r in records]
+
+
+def test_detect_finds_names_and_aliases_in_order(catalog):
+    assert _names(catalog.detect("Visiting France after the UK and Japan")) == ["France", "United Kingdom", "Japan"]
+    assert _names(catalog.detect("Tipping in the USA?")) == ["United States"]
+
+
+def test_detect_skips_aliases_that_are_ordinary_words(catalog):
+    assert catalog.detect("Tell us about greetings") == []
+    # "america" alone would turn every region into the United States
+    assert catalog.detect("Tipping customs in South America?") == []
+    assert catalog.detect("Greetings in Latin America and Central America") == []
+
+
+def test_resolve_still_accepts_every_alias(catalog):
+    for alias in ("us", "USA", "America"):
+        assert catalog.resolve(alias).name == "United States"
@@ -0,0 +1,32 @@
+from app.country_detector import CountryDetector
+
+DETECTOR = CountryDetector([
+    ("Sudan", "Sudan"),
+    ("South Sudan", "South Sudan"),
+    ("Oman", "Oman"),
+    ("Japan", "Japan"),
+    ("United Kingdom", "United Kingdom"),
+    ("uk", "United Kingdom"),
+])
+
+
+def test_detects_countries_in_order_of_first_mention():
+    assert DETECTOR.detect("Is Japan stricter than the UK? And japan again") == ["Japan", "United Kingdom"]
+
+
+def test_matches_only_whole_words():
+    assert DETECTOR.detect("A woman in Ukraine") == []
+    assert DETECTOR.detect("Oman, then uk.") == ["Oman", "United Kingdom"]
+
+
+def test_longest_match_wins():
+    assert DETECTOR.find_all("visiting south   sudan") == [(9, 20, "South Sudan")]
+    assert DETECTOR.detect("Sudan or South Sudan") == ["Sudan", "South Sudan"]
+
+
+def test_case_and_spacing_are_ignored():
+    assert DETECTOR.detect("UNITED   kingdom customs") == ["United Kingdom"]
+
+
+def test_no_patterns():
+    assert CountryDetector([]).detect("Japan") == []
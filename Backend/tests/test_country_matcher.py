@@ -0,0 +1,40 @@
+from app.country_matcher import FuzzyIndex, PrefixTrie
+
+
+def test_correct_fixes_an_unambiguous_typo():
+    index = FuzzyIndex([("japan", "Japan"), ("philippines", "Philippines"), ("france", "France")])
+    assert index.correct("japn") == "Japan"
+    assert index.correct("phillipines") == "Philippines"
+
+
+def test_correct_refuses_a_tie():
+    # "irac" is one edit from both, so neither is the obvious answer
+    index = FuzzyIndex([("iran", "Iran"), ("iraq", "Iraq")])
+    (first, first_distance, _), (second, second_distance, _) = index.search("irac", limit=2)
+    assert {first, second} == {"Iran", "Iraq"} and first_distance == second_distance == 1
+    assert index.correct("irac") is None
+    assert index.correct("iraw") is None
+    assert index.correct("irak") is None
+
+
+def test_keys_of_the_same_value_are_not_a_tie():
+    uk = object()
+    index = FuzzyIndex([("united kingdom", uk), ("united kingdon", uk)])
+    assert index.correct("united kingdam") is uk
+
+
+def test_correct_rejects_distant_keys():
+    index = FuzzyIndex([("japan", "Japan")])
+    assert index.correct("jordan") is None
+    assert index.correct("") is None
+
+
+def test_prefix_trie_ranks_name_starts_before_later_words():
+    trie = PrefixTrie([("south korea", "South Korea", "South Korea"), ("korea", "Korea", "Korea"),
+                       ("kosovo", "Kosovo", "Kosovo"), ("uk", "United Kingdom", "United Kingdom"),
+                       ("united kingdom", "United Kingdom", "United Kingdom")])
+    assert trie.complete("ko") == ["Korea", "Kosovo", "South Korea"]
+    assert trie.complete("kor", limit=1) == ["Korea"]
+    # An alias and the name itself lead to one entry
+    assert trie.complete("u") == ["United Kingdom"]
+    assert trie.complete("x") == []
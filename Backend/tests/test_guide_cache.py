@@ -0,0 +1,56 @@
+from app.compression import variant_etag
+from app.guide_cache import PayloadCache, etag_matches
+
+ETAG = '"0123456789abcdef"'
+
+
+def test_etag_matches():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches("W/" + ETAG, ETAG)
+    assert etag_matches('"other", ' + ETAG, ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+    assert not etag_matches('"other"', ETAG)
+
+
+def test_compressed_variants_match_their_identity_etag():
+    assert etag_matches(variant_etag(ETAG, "gzip"), ETAG)
+    assert etag_matches(variant_etag(ETAG, "br"), ETAG)
+    assert not etag_matches(variant_etag('"other"', "gzip"), ETAG)
+
+
+def test_put_returns_the_body_and_its_etag():
+    payload = PayloadCache().put(1, 7, {"country": "Japan", "details": []})
+    assert payload.body == b'{"country":"Japan","details":[]}'
+    assert payload.etag.startswith('"') and payload.etag.endswith('"')
+    assert PayloadCache().put(1, 7, {"country": "Japan", "details": []}).etag == payload.etag
+
+
+def test_cache_drops_entries_when_the_version_changes():
+    cache = PayloadCache()
+    first = cache.put(1, 7, {"country": "Japan"})
+    assert cache.get(1, 7) is first
+    assert cache.get(2, 7) is None
+
+    cache.put(2, 8, {"country": "France"})
+    assert cache.get(2, 7) is None
+    assert cache.get(1, 7) is None
+    assert cache.get(2, 8) is not None
+
+
+def test_cached_response_304_only_when_the_etag_matches():
+    from app.main import cached_response
+
+    payload = PayloadCache().put(1, "japan", {"country": "Japan", "details": []})
+
+    response = cached_response(payload, None, None)
+    assert response.status_code == 200
+    assert response.body == payload.body
+    assert response.headers["etag"] == payload.etag
+
+    response = cached_response(payload, payload.etag, None)
+    assert response.status_code == 304
+    assert response.body == b""
+
+    assert cached_response(payload, '"stale"', None).status_code == 200
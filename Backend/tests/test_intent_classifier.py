@@ -0,0 +1,42 @@
+from app.intent_classifier import IntentClassifier, default_classifier, tokenize
+
+
+def test_tokenize_keeps_apostrophes_inside_words():
+    assert tokenize("Don’t   TIP, ok?") == ["don't", "tip", "ok"]
+
+
+def test_longest_ngram_consumes_its_tokens():
+    classifier = IntentClassifier({"DO": {"do": 1.0}, "DONT": {"do not": 2.0}}, default="DO")
+    assert classifier.scores("do not do that") == {"DONT": 2.0, "DO": 1.0}
+    assert classifier.classify("do not touch").intent == "DONT"
+
+
+def test_ties_go_to_the_earlier_priority():
+    intents = {"A": {"x": 1.0}, "B": {"y": 1.0}}
+    assert IntentClassifier(intents, default="A", priority=["A", "B"]).classify("x y").intent == "A"
+    assert IntentClassifier(intents, default="A", priority=["B", "A"]).classify("x y").intent == "B"
+
+
+def test_no_keyword_falls_back_to_the_default():
+    assert default_classifier.classify("Japan?") == ("TOP_TIPS", 0.0)
+
+
+def test_default_keywords():
+    cases = {
+        "Hello there": "GREETING",
+        "Good morning!": "GREETING",
+        "Is it okay to slurp noodles?": "DO",
+        "What should I avoid in India?": "DONT",
+        "Don't do what?": "DONT",
+        "Give me some tips": "TOP_TIPS",
+        "Calculate 2 + 2": "OFF_TOPIC",
+        "Dress code for temples in Thailand?": "TOP_TIPS",
+        "Write some Python code": "OFF_TOPIC",
+        # "tip" outweighs the generic "can i" / "should i" lead-ins
+        "Can I tip in Japan?": "TOP_TIPS",
+        "Should I leave a tip?": "TOP_TIPS",
+        "Can I wear shoes inside?": "DO",
+        "You shouldn't tip in Japan": "DONT",
+    }
+    for message, intent in cases.items():
+        assert default_classifier.classify(message).intent == intent, message
@@ -0,0 +1,64 @@
+import pytest
+
+from app import crud
+from app.quiz_bank import QuizBank
+
+
+@pytest.fixture
+def bank(db):
+    bank = QuizBank()
+    bank.load(db)
+    return bank
+
+
+@pytest.fixture
+def countries(db):
+    return {c.name: c.id for c in crud.get_all_countries(db)}
+
+
+def test_questions_are_ready_to_send(bank, countries):
+    first = bank.questions(countries["Japan"])[0]
+    assert first["question"] == "Japan question 0?"
+    assert first["options"] == ["Yes", "No", "Maybe", "Never"]
+    assert first["answer"] == "Yes"
+    assert bank.questions(-1) == ()
+
+
+def test_pages_without_a_seed_keep_bank_order(bank, countries):
+    ids = [countries["Japan"], countries["France"]]
+    everything, total = bank.page(ids)
+    assert total == 8
+    assert [q["question"] for q in everything] == (
+        [f"Japan question {i}?" for i in range(5)] + [f"France question {i}?" for i in range(3)])
+
+    page, total = bank.page(ids, limit=3, offset=4)
+    assert total == 8
+    assert page == everything[4:7]
+    assert bank.page(ids, limit=3, offset=8) == ([], 8)
+
+
+def test_seeded_order_is_a_reproducible_shuffle(bank, countries):
+    ids = [countries["Japan"], countries["France"]]
+    everything, _ = bank.page(ids)
+    shuffled, total = bank.page(ids, seed="abc")
+    assert total == 8
+    assert sorted(q["id"] for q in shuffled) == sorted(q["id"] for q in everything)
+    assert bank.page(ids, seed="abc")[0] == shuffled
+
+    # Paging through a seeded order walks the same sequence
+    pages = [bank.page(ids, limit=3, offset=offset, seed="abc")[0] for offset in (0, 3, 6)]
+    assert [q for page in pages for q in page] == shuffled
+
+    orders = {tuple(q["id"] for q in bank.page(ids, seed=seed)[0]) for seed in range(100)}
+    # More orders than any "a*i + b mod 8" stride pattern can produce (8 * 4 = 32)
+    assert len(orders) > 32
+    # A numeric seed and its query-string form give the same order
+    assert bank.page(ids, seed=7)[0] == bank.page(ids, seed="7")[0]
+
+
+def test_find_only_returns_the_countrys_own_questions(bank, countries):
+    japan, france = countries["Japan"], countries["France"]
+    question = bank.questions(japan)[2]
+    assert bank.find(japan, question["id"]) == question
+    assert bank.find(france, question["id"]) is None
+    assert bank.find(japan, -1) is None and bank.find(-1, question["id"]) is None
@@ -0,0 +1,70 @@
+from sqlalchemy import text
+
+from app import crud, search
+
+
+def _country_id(db, name):
+    return next(c.id for c in crud.get_all_countries(db) if c.name == name)
+
+
+def test_search_terms_drop_stopwords_digits_and_repeats():
+    assert search.search_terms("How do I bow, bow 2 times in Japan?") == ["bow", "times", "japan"]
+    assert search.search_terms("Japan customs", ignore={"japan"}) == []
+    assert search.search_terms("Tell us about him, it's ours") == []
+
+
+def test_shares_word_allows_simple_endings_only():
+    assert search.shares_word(["bowing"], "Bowing. Bow to greet.")
+    assert search.shares_word(["tipping"], "Don't tip in restaurants.")
+    assert search.shares_word(["kissing"], "Cheek kisses among friends.")
+    assert not search.shares_word(["bowls"], "Bowing. Bow to greet.")
+    assert not search.shares_word(["sticky"], "Chopsticks. Never stick them upright in rice.")
+
+
+def test_ranked_hits_with_snippets(db):
+    hits = search.search(db, "chopsticks in rice")
+    assert [h.topic for h in hits] == ["Chopsticks"]
+    assert "<mark>" in hits[0].snippet
+    # Porter stemming: "bowing" finds "Bow to greet."
+    assert [h.topic for h in search.search(db, "bowing")] == ["Bowing"]
+    assert search.search(db, "what is it") == []
+    # "tip" is a topic word, not filler
+    assert [h.topic for h in search.search(db, "tip etiquette")] == ["Don't"]
+
+
+def test_scoped_to_one_country(db):
+    japan, france = _country_id(db, "Japan"), _country_id(db, "France")
+    assert [h.topic for h in search.search(db, "kisses", country_id=france)] == ["La bise"]
+    assert search.search(db, "kisses", country_id=japan) == []
+
+
+def test_scope_holds_when_countries_interleave(engine, db):
+    japan, france = _country_id(db, "Japan"), _country_id(db, "France")
+    # Added after France's details, so Japan's id range now spans France's "La bise"
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO cultural_details (country_id, category, topic, description, is_strict) "
+                          "VALUES (:c, 'GREETING', 'Kisses', 'Kisses are rare in public.', 0)"), {"c": japan})
+    assert [h.topic for h in search.search(db, "cheek kisses", country_id=japan, limit=1)] == ["Kisses"]
+    assert [h.topic for h in search.search(db, "cheek kisses", country_id=france)] == ["La bise"]
+    assert search.search(db, "kisses", country_id=-1) == []
+
+
+def test_index_follows_edits(engine, db):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cultural_details SET description = 'Slurping noodles is polite.' "
+                          "WHERE topic = 'Chopsticks'"))
+    assert [h.topic for h in search.search(db, "noodles")] == ["Chopsticks"]
+    assert search.search(db, "rice") == []
+
+
+def test_query_syntax_is_not_interpreted(db):
+    assert search.search(db, 'bow" OR topic:*') != []
+    assert search.search(db, "NEAR(") == []
+
+
+def test_fallback_scan_matches_the_same_details(db):
+    france = _country_id(db, "France")
+    hits = search._fallback_search(db, ["chopsticks"], None, 5)
+    assert [h.topic for h in hits] == ["Chopsticks"]
+    assert search._fallback_search(db, ["chopsticks"], france, 5) == []
+    assert [h.topic for h in search._fallback_search(db, ["kisses"], france, 5)] == ["La bise"]
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.sessions import ChatSession, MemorySessionBackend, SessionBackend, SessionStore
+
+JAPAN = SimpleNamespace(id=1, name="Japan")
+FRANCE = SimpleNamespace(id=2, name="France")
+
+
+def test_remember_keeps_only_the_recent_intents():
+    session = ChatSession("s")
+    for i in range(settings.chat_session_history + 3):
+        session.remember(JAPAN, f"INTENT{i}")
+    assert len(session.intents) == settings.chat_session_history
+    assert session.intents[-1] == f"INTENT{settings.chat_session_history + 2}"
+
+
+def test_remember_tracks_the_active_country():
+    session = ChatSession("s")
+    session.remember(JAPAN, "GREETING")
+    assert session.country_id == 1
+    # No country in a turn keeps the active one
+    session.remember(None, "TOP_TIPS")
+    assert session.country_id == 1
+    session.remember(FRANCE, "DO")
+    assert session.country_id == 2 and session.intents == ["GREETING", "TOP_TIPS", "DO"]
+
+
+def test_round_trips_through_a_plain_dict():
+    session = ChatSession("s")
+    session.remember(JAPAN, "GREETING")
+    state = session.to_dict()
+    assert state == {"id": "s", "country_id": 1, "intents": ["GREETING"]}
+    assert ChatSession.from_dict(state) == session
+
+
+def test_backends_must_implement_the_whole_interface():
+    class Partial(SessionBackend):
+        def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_memory_backend_evicts_the_least_recently_used():
+    backend = MemorySessionBackend(max_sessions=2, idle_ttl=60, clock=lambda: 0.0)
+    backend.set("a", {"id": "a"})
+    backend.set("b", {"id": "b"})
+    assert backend.get("a") is not None
+    backend.set("a", {"id": "a"})
+    backend.set("c", {"id": "c"})
+    assert backend.get("b") is None and backend.get("a") is not None
+    assert len(backend) == 2 and backend.evicted == 1
+
+
+def test_memory_backend_expires_idle_sessions():
+    now = [0.0]
+    backend = MemorySessionBackend(max_sessions=10, idle_ttl=30, clock=lambda: now[0])
+    backend.set("a", {"id": "a"})
+    now[0] = 29.0
+    assert backend.get("a") is not None
+    now[0] = 59.0
+    assert backend.get("a") is None and backend.expired == 1
+
+
+def test_store_starts_a_new_session_for_unknown_ids():
+    store = SessionStore(MemorySessionBackend(max_sessions=10, idle_ttl=60))
+    session = store.load(None)
+    session.remember(JAPAN, "GREETING")
+    store.save(session)
+    assert store.load(session.id) == session
+    assert store.load("missing").id != session.id
+    assert store.created == 2
@@ -0,0 +1,147 @@
+import os
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app import snapshot as snapshot_module
+from app.guide_cache import build_guide, make_etag, serialize
+from app.snapshot import Snapshot, SnapshotStore, build
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "snapshot.bin")
+
+
+def test_build_and_open(db, path):
+    meta = build(db, path)
+    snapshot = Snapshot(path)
+    assert snapshot.data_version == meta["data_version"] == crud.get_data_version(db)
+
+    countries = {name: (country_id, language) for country_id, name, language in snapshot.countries()}
+    assert countries == {c.name: (c.id, c.language) for c in crud.get_all_countries(db)}
+    japan = countries["Japan"][0]
+
+    details = snapshot.details(japan)
+    assert [(d.topic, d.description) for d in details] == [
+        (d.topic, d.description) for d in crud.get_cultural_details(db, japan)]
+
+    questions = snapshot.questions(japan)
+    assert len(questions) == 5
+    assert questions[0] == {"id": questions[0]["id"], "question": "Japan question 0?",
+                            "options": ["Yes", "No", "Maybe", "Never"], "answer": "Yes"}
+    assert [q["question"] for q in questions[1:3]] == ["Japan question 1?", "Japan question 2?"]
+    with pytest.raises(IndexError):
+        questions[5]
+
+    assert snapshot.details(-1) == [] and len(snapshot.questions(-1)) == 0 and snapshot.guide(-1) is None
+
+
+def test_guides_match_what_the_api_builds(db, path):
+    build(db, path)
+    snapshot = Snapshot(path)
+    for country in crud.get_all_countries(db):
+        body = serialize(build_guide(country, crud.get_cultural_details(db, country.id)))
+        payload = snapshot.guide(country.id)
+        assert bytes(payload.body) == body
+        assert payload.etag == make_etag(body)
+
+
+def test_rejects_a_file_that_is_not_a_snapshot(path):
+    with open(path, "wb") as f:
+        f.write(b"not a snapshot" * 10)
+    with pytest.raises(Exception):
+        Snapshot(path)
+    assert SnapshotStore(path, check_interval=0, enabled=True).current() is None
+
+
+def test_store_swaps_to_a_rebuilt_file(engine, db, path):
+    now = [0.0]
+    store = SnapshotStore(path, check_interval=5, enabled=True, clock=lambda: now[0])
+    assert store.current() is None
+
+    store.ensure_current(db)
+    first = store.current()
+    assert first is not None and first.data_version == crud.get_data_version(db)
+    store.ensure_current(db)
+    assert store.current() is first and store.swaps == 1
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE cultural_details SET description = 'Bow deeply.' WHERE topic = 'Bowing'"))
+    db.rollback()
+    # Another process rebuilds the file; this store notices after check_interval
+    build(db, path)
+    assert store.current() is first
+    now[0] = 6.0
+    second = store.current()
+    assert second is not first and store.swaps == 2
+    japan = next(country_id for country_id, name, _ in second.countries() if name == "Japan")
+    assert "Bow deeply." in [d.description for d in second.details(japan)]
+    assert "Bow deeply." not in [d.description for d in first.details(japan)]
+    # The old mapping stays readable for requests still holding it
+    assert first.countries() == second.countries()
+
+
+def test_disabled_store_never_maps(db, path):
+    build(db, path)
+    assert SnapshotStore(path, enabled=False).current() is None
+
+
+def test_find_question_by_id(db, path):
+    build(db, path)
+    snapshot = Snapshot(path)
+    countries = {name: country_id for country_id, name, _ in snapshot.countries()}
+    japan, france = countries["Japan"], countries["France"]
+    for question in snapshot.questions(japan):
+        assert snapshot.find_question(japan, question["id"]) == question
+        assert snapshot.find_question(france, question["id"]) is None
+    assert snapshot.find_question(japan, -1) is None and snapshot.find_question(-1, 1) is None
+
+
+def test_concurrent_builds_do_not_share_a_temp_file(db, path):
+    errors = []
+
+    def run():
+        try:
+            build(db, path)
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert Snapshot(path).data_version == crud.get_data_version(db)
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.startswith("snapshot")] == ["snapshot.bin"]
+
+
+def test_ensure_current_builds_once_for_concurrent_callers(engine, path, monkeypatch):
+    builds = []
+
+    def counting_build(db, path):
+        builds.append(path)
+        return build(db, path)
+
+    monkeypatch.setattr(snapshot_module, "build", counting_build)
+    store = SnapshotStore(path, check_interval=60, enabled=True)
+    Session = sessionmaker(bind=engine)
+
+    def run():
+        db = Session()
+        try:
+            store.ensure_current(db)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert builds == [path]
+    assert store.current() is not None and store.swaps == 1
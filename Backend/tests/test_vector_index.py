@@ -0,0 +1,38 @@
+import pytest
+
+from app.catalog import CountryCatalog
+from app.chat_service import ChatService
+from app.vector_index import VectorIndex
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def service(db, tmp_path):
+    catalog = CountryCatalog()
+    catalog.load(db)
+    index = VectorIndex(path=str(tmp_path / "vectors"))
+    index.build(db)
+    return ChatService(db, catalog=catalog, vectors=index)
+
+
+def _topics(service, message, country):
+    return [d.topic for d, _ in service.retrieve(message, service.catalog.resolve(country))]
+
+
+def test_retrieves_the_matching_rule(service):
+    assert _topics(service, "Is it rude to leave chopsticks in my rice?", "Japan") == ["Chopsticks"]
+    # A shared stem is enough: "bowing" finds "Bow to greet."
+    assert _topics(service, "bowing", "Japan") == ["Bowing"]
+
+
+def test_shared_trigrams_alone_are_not_a_match(service):
+    # "bowls" and "sticky" score well against "Bow" and "Chopsticks" on trigrams alone
+    assert _topics(service, "bowls", "Japan") == []
+    assert _topics(service, "sticky", "Japan") == []
+
+
+def test_pronouns_and_filler_are_not_a_match(service):
+    assert _topics(service, "Tell us about France", "France") == []
+    assert _topics(service, "What do we do?", "Japan") == []
+    assert service.retrieve("Tell us about France", None) == []
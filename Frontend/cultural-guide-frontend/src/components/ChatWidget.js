@@ -2,6 +2,17 @@ import React, { useState } from 'react';
 import { MessageCircle, X, Send } from 'lucide-react';
 import '../App.css';
 
+// Parse one Server-Sent Events block ("event: ...\ndata: {...}")
+const parseEvent = (block) => {
+    let event = "message";
+    let data = "";
+    block.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+    });
+    return { event, data: data ? JSON.parse(data) : {} };
+};
+
 const ChatWidget = ({ globalContextCountry }) => {
     const [isOpen, setIsOpen] = useState(false);
     const [input, setInput] = useState("");
@@ -9,6 +20,15 @@ const ChatWidget = ({ globalContextCountry }) => {
         { sender: "bot", text: "Hi! I'm your travel assistant. Ask me anything about local customs!" }
     ]);
     const [loading, setLoading] = useState(false);
+    // Lets the server remember the active country between messages
+    const [sessionId, setSessionId] = useState(null);
+
+    const appendToLastBot = (text) => {
+        setHistory((prev) => {
+            const last = prev[prev.length - 1];
+            return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+        });
+    };
 
     const handleSubmit = async (e) => {
         e.preventDefault();
@@ -24,17 +44,38 @@ const ChatWidget = ({ globalContextCountry }) => {
         try {
             const payload = {
                 message: userMsg,
-                country: contextToSend
+                country: contextToSend,
+                session_id: sessionId
             };
 
-            const res = await fetch("http://127.0.0.1:8000/api/chat", {
+            // Streamed answer: the bubble fills in line by line as events arrive
+            const res = await fetch("http://127.0.0.1:8000/api/chat/stream", {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify(payload)
             });
+            if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
 
-            const data = await res.json();
-            setHistory((prev) => [...prev, { sender: "bot", text: data.response }]);
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const blocks = buffer.split("\n\n");
+                buffer = blocks.pop();
+                for (const block of blocks) {
+                    const { event, data } = parseEvent(block);
+                    if (event === "country") {
+                        if (data.session_id) setSessionId(data.session_id);
+                        setLoading(false);
+                        setHistory((prev) => [...prev, { sender: "bot", text: "" }]);
+                    } else if (event === "message") {
+                        appendToLastBot(data.text);
+                    }
+                }
+            }
         } catch (err) {
             setHistory((prev) => [...prev, { sender: "bot", text: "Sorry, I had trouble reaching the server." }]);
         } finally {
@@ -4,19 +4,21 @@ import { Search, MapPin, ChevronRight, BookOpen } from 'lucide-react';
 import '../App.css';
 
 const HomePage = ({ setGlobalCountry }) => {
-    const [countries, setCountries] = useState([]);
+    // Full country list, fetched only when the user asks to browse it
+    const [countries, setCountries] = useState(null);
+    const [browsing, setBrowsing] = useState(false);
     const [searchTerm, setSearchTerm] = useState("");
     const [guide, setGuide] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
+    // Server-side matches for the search box (null = nothing typed)
+    const [suggestions, setSuggestions] = useState(null);
 
     const navigate = useNavigate();
 
-    useEffect(() => {
-        fetchCountries();
-    }, []);
-
-    const fetchCountries = async () => {
+    const browseCountries = async () => {
+        setBrowsing(true);
+        if (countries !== null) return;
         try {
             const response = await fetch("http://127.0.0.1:8000/api/countries");
             const data = await response.json();
@@ -26,17 +28,45 @@ const HomePage = ({ setGlobalCountry }) => {
         }
     };
 
+    useEffect(() => {
+        const term = searchTerm.trim();
+        if (!term) {
+            setSuggestions(null);
+            return;
+        }
+        // Debounced prefix/typo-tolerant lookup instead of filtering the full list
+        const controller = new AbortController();
+        const timer = setTimeout(async () => {
+            try {
+                const response = await fetch(
+                    `http://127.0.0.1:8000/api/countries/suggest?q=${encodeURIComponent(term)}&limit=20`,
+                    { signal: controller.signal }
+                );
+                setSuggestions(await response.json());
+            } catch (err) {
+                if (err.name !== "AbortError") console.error("Error fetching suggestions:", err);
+            }
+        }, 150);
+        return () => {
+            clearTimeout(timer);
+            controller.abort();
+        };
+    }, [searchTerm]);
+
     const loadCountryData = async (countryName) => {
         setLoading(true);
         setGlobalCountry(countryName);
 
         try {
             const response = await fetch(`http://127.0.0.1:8000/api/guide/${countryName}`);
-            if (!response.ok) throw new Error("Country data not found");
             const data = await response.json();
+            if (!response.ok) {
+                const hint = data.suggestions && data.suggestions.length ? ` Did you mean ${data.suggestions[0]}?` : "";
+                throw new Error(`Country not found.${hint}`);
+            }
             setGuide(data);
         } catch (err) {
-            setError("Country not found.");
+            setError(err.message || "Country not found.");
             setGuide(null);
         } finally {
             setLoading(false);
@@ -61,9 +91,7 @@ const HomePage = ({ setGlobalCountry }) => {
         return map[category] || "📘";
     };
 
-    const filteredCountries = countries.filter(c =>
-        c.name.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    const filteredCountries = suggestions !== null ? suggestions : (browsing && countries) || [];
 
     return (
         <div className="container fade-in">
@@ -93,6 +121,12 @@ const HomePage = ({ setGlobalCountry }) => {
                             onChange={(e) => setSearchTerm(e.target.value)}
                         />
                     </div>
+
+                    {!browsing && !searchTerm.trim() && (
+                        <button className="btn-large btn-dark" style={{ marginTop: '1.5rem' }} onClick={browseCountries}>
+                            Browse all countries <ChevronRight size={18} />
+                        </button>
+                    )}
                 </div>
             )}
 
@@ -3,12 +3,17 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { Award, RefreshCcw, Home, ChevronLeft } from 'lucide-react';
 import '../App.css';
 
+// Questions are fetched a page at a time, never the whole bank
+const PAGE_SIZE = 10;
+
 const QuizPage = () => {
     const { countryName } = useParams();
     const navigate = useNavigate();
 
     const [quizData, setQuizData] = useState([]);
+    const [total, setTotal] = useState(0);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     const [currentIndex, setCurrentIndex] = useState(0);
     const [score, setScore] = useState(0);
@@ -16,23 +21,54 @@ const QuizPage = () => {
     const [selectedOption, setSelectedOption] = useState(null);
     const [isCorrect, setIsCorrect] = useState(null);
 
+    const fetchPage = async (offset) => {
+        const res = await fetch(
+            `http://127.0.0.1:8000/api/quiz/${encodeURIComponent(countryName)}?limit=${PAGE_SIZE}&offset=${offset}`
+        );
+        if (!res.ok) return null;
+        const questions = await res.json();
+        // The server sends the bank size in a header; fall back to what we got
+        const count = parseInt(res.headers.get("X-Total-Count"), 10);
+        return { questions, total: Number.isNaN(count) ? offset + questions.length : count };
+    };
+
     useEffect(() => {
-        fetchQuiz();
+        setLoading(true);
+        setQuizData([]);
+        setTotal(0);
+        setCurrentIndex(0);
+        fetchPage(0)
+            .then(page => {
+                if (page) {
+                    setQuizData(page.questions);
+                    setTotal(page.total);
+                }
+            })
+            .catch(err => console.error(err))
+            .finally(() => setLoading(false));
     }, [countryName]);
 
-    const fetchQuiz = async () => {
-        try {
-            const res = await fetch(`http://127.0.0.1:8000/api/quiz/${countryName}`);
-            if (res.ok) {
-                const data = await res.json();
-                setQuizData(data);
-            }
-        } catch (err) {
-            console.error(err);
-        } finally {
-            setLoading(false);
-        }
-    };
+    // Fetch the next page a couple of questions before the loaded ones run out
+    useEffect(() => {
+        if (loadingMore || quizData.length >= total || currentIndex < quizData.length - 2) return;
+        setLoadingMore(true);
+        fetchPage(quizData.length)
+            .then(page => {
+                if (page && page.questions.length > 0) {
+                    setQuizData(prev => prev.concat(page.questions));
+                    setTotal(page.total);
+                } else {
+                    // Nothing more to get; end the quiz with what we have
+                    setTotal(quizData.length);
+                }
+            })
+            .catch(err => {
+                console.error(err);
+                // Don't retry in a loop; end the quiz with what we have
+                setTotal(quizData.length);
+            })
+            .finally(() => setLoadingMore(false));
+    }, [currentIndex, quizData.length, total, loadingMore]);
 
     const handleOptionClick = (option) => {
         if (selectedOption) return;
@@ -45,8 +81,16 @@ const QuizPage = () => {
         setIsCorrect(correct);
         if (correct) setScore(score + 1);
 
+        // Fire-and-forget: the server grades and records it for the difficulty stats
+        fetch(`http://127.0.0.1:8000/api/quiz/${countryName}/attempts`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ attempts: [{ question_id: currentQ.id, answer: option }] }),
+            keepalive: true,
+        }).catch(err => console.error("Error recording attempt:", err));
+
         setTimeout(() => {
-            if (currentIndex + 1 < quizData.length) {
+            if (currentIndex + 1 < total) {
                 setCurrentIndex(currentIndex + 1);
                 setSelectedOption(null);
                 setIsCorrect(null);
@@ -78,7 +122,7 @@ const QuizPage = () => {
                     </div>
                     <h2 className="result-title">Quiz Complete!</h2>
                     <p className="result-score">
-                        You scored <span className="score-highlight">{score}</span> out of {quizData.length}
+                        You scored <span className="score-highlight">{score}</span> out of {total}
                     </p>
                     <div className="result-actions">
                         <button className="btn-large btn-dark" onClick={() => navigate("/")}>
@@ -96,8 +140,10 @@ const QuizPage = () => {
     }
 
     // Question View
-    const progressPercent = ((currentIndex + 1) / quizData.length) * 100;
     const currentQ = quizData[currentIndex];
+    // The next page is still on its way
+    if (!currentQ) return <div className="quiz-container">Loading...</div>;
+    const progressPercent = ((currentIndex + 1) / total) * 100;
 
     return (
         <div className="quiz-container fade-in">
@@ -107,7 +153,7 @@ const QuizPage = () => {
 
             <div className="quiz-header-row">
                 <div>
-                    <span className="q-count">Question {currentIndex + 1} of {quizData.length}</span>
+                    <span className="q-count">Question {currentIndex + 1} of {total}</span>
                     <h2 className="q-heading">{countryName} Knowledge</h2>
                 </div>
             </div>